@@ -7,20 +7,37 @@
 # For the full copyright and license information, please view the LICENSE
 # file that was distributed with this source code.
 
+import importlib
 import sys
+import weakref
 
-if sys.version_info >= (3, 0):
-    from itertools import zip_longest
-else:
-    from itertools import izip_longest as zip_longest
-
-
-from collections import Callable
 from functional import compose
+from functools import wraps
+from operator import attrgetter
 
+from sagitta import config, hooks, recursion, registry, stats, strategy
+from sagitta.cat import issubtype
+from sagitta.compiler import INLINE_CACHE_SIZE, compile_arrow, compile_validators, disguise, filename
+from sagitta.container import Container, islazy, parse
 from sagitta.exceptions import StrictTypeError
+from sagitta.sampling import Sampler
 from sagitta.typevar import TypeVariable
-from sagitta.inspect import classname
+from sagitta.inspect import classname, iscoroutinefunction
+
+
+OPTIONS = ('recursion', 'elements')
+
+
+def options(constraints):
+    """
+    Validate the options of typed among the constraints.
+
+    Options are lowercase keywords, while the constraints are for the
+    uppercase type variables.
+    """
+    for key in constraints:
+        if key.islower() and key not in OPTIONS:
+            raise TypeError("Unknown option '{0}', expected one of {1}.".format(key, ', '.join(OPTIONS)))
 
 
 def typed(*types, **constraints):
@@ -29,12 +46,66 @@ def typed(*types, **constraints):
 
     The last value of types is always the type of the return value.
     Constraints can be any typeclass or Python class.
+
+    The arrows are registered in sagitta.registry, which can turn
+    their checking on and off by module.
+
+    When checking is turned off with sagitta.config, the function is
+    returned unchecked, see declare.
+
+    Option recursion='outermost' checks a recursive function only at the
+    outermost entry, and recursion='trampoline' also runs a tail recursive
+    function in constant stack space, see recursive.
+
+    Option elements chooses how many elements of containers are checked,
+    see sagitta.strategy.
     """
+    options(constraints)
+    mode = constraints.pop('recursion', None)
+    if mode is not None:
+        recursion.validate(mode)
+
     def function(fun):
-        return arrow(fun, *types, **constraints)
+        if mode == recursion.TRAMPOLINE and not config.checking():
+            unchecked = recursive(fun, *types, recursion=mode, **constraints)
+            unchecked.set_checking(False)
+            return unchecked
+        if not config.checking():
+            return declare(fun, *types, **constraints)
+        if mode is not None:
+            return registry.register(recursive(fun, *types, recursion=mode, **constraints))
+        return registry.register(arrow(fun, *types, **constraints))
     return function
 
 
+def declare(fun, *types, **constraints):
+    """
+    Declare the type signature of a function without checking it.
+
+    Validates the signature and returns the function itself with the
+    signature as its signature attribute, so that calls cost nothing extra.
+    Functions that do not take attributes (like builtins), classes and
+    functions that have a signature already are returned in a thin wrapper
+    instead.
+    """
+    if not callable(fun):
+        raise StrictTypeError("'{0}' object is not callable.".format(type(fun).__name__))
+
+    sig = signature(*types, **constraints)
+    if not isinstance(fun, type) and not hasattr(fun, 'signature'):
+        try:
+            fun.signature = sig
+            return fun
+        except (AttributeError, TypeError):
+            pass
+
+    @wraps(fun)
+    def declared(*args, **kwargs):
+        return fun(*args, **kwargs)
+    declared.signature = sig
+    return declared
+
+
 class arrow(object):
     """
     An arrow is a function typed with Haskell like function type declaration
@@ -61,64 +132,384 @@ class arrow(object):
 
         Raises a StrictTypeError if the checks fail.
         """
-        if not isinstance(fun, Callable):
+        if not callable(fun):
             raise StrictTypeError("'{0}' object is not callable.".format(type(fun).__name__))
 
         self._fun = fun
         self.signature = signature(*types, **constraints)
+        self._inline_cache = []
+        self._megamorphic = False
+        self._validators = None
+        self._checking = True
+        self._sampler = None
+        self._statistics = None
+        self._hooks = {}
+        self._trusting = False
+        self._trusted = None
+        self._dependents = None
+        self._awaits = iscoroutinefunction(fun)
+        self._paths = weakref.WeakValueDictionary()  # <- code of the call paths by id, see sagitta.profiling
+        self._compile()
+        hooks.track(self)
+
+    # Calls go directly to the call path compiled for the signature,
+    # without an intermediate Python frame.
+    __call__ = property(attrgetter('_call'))
 
-    def __call__(self, *args, **kwargs):
-        if len(list(args)) != len(self.signature.args):
-            raise StrictTypeError(
-                "Wrong number of arguments in '{0}' for {1}."
-                "".format(args, self.signature)
-            )
-        args = [
-            self.check(arg, typeclass)
-            for arg, typeclass
-            in zip_longest(args, self.signature.args)
-        ]
-        return self.check(
-            self._fun(*args),
-            self.signature.returns)
+    @property
+    def checking(self):
+        return self._checking
 
-    def check(self, value, expected):
-        if issubclass(expected, TypeVariable):
-            if expected in self.signature.constraints:
-                if not issubclass(type(value), self.signature.constraints[expected]):
-                    raise StrictTypeError(
-                        "Expected argument '{0}' {1} to be of type {2}."
-                        "".format(value, type(value), self.signature.constraints[expected])
-                    )
-            else:
-                self.signature.constraints[expected] = type(value)
-        elif not issubclass(type(value), expected):
-            raise StrictTypeError(
-                "Argument '{0}' {1} is of wrong type for {3}, expected {2}."
-                "".format(value, type(value), expected, self.signature)
-            )
-        return value
+    def set_checking(self, enabled):
+        """
+        Switch the arrow between the checked call path and calling the typed
+        function directly.
+        """
+        self._checking = bool(enabled)
+        self._compile()
 
-    def __rshift__(self, other):
-        assert isinstance(other, type(self))
-        common_types = self.signature.types[:-1]
-        assert other.signature.types[:len(common_types) - 1] == common_types[:-1]
+    def set_sampling(self, rate=None):
+        """
+        Check only a sample of the calls: every Nth call for an integer
+        rate N, or a random fraction of the calls for a float rate.
+        Rate None checks every call.
+        """
+        self._sampler = None if rate is None else Sampler(rate)
+        self._compile()
+
+    def set_statistics(self, enabled=True):
+        """
+        Enable or disable recording the statistics of the checked calls,
+        see sagitta.stats.
+        """
+        if enabled and self._statistics is None:
+            self._statistics = stats.Statistics()
+            stats.track(self)
+        elif not enabled:
+            self._statistics = None
+            stats.untrack(self)
+        self._compile()
+
+    def set_trusting(self, enabled=True):
+        """
+        Skip checking arguments that were just returned and checked by
+        another trusting arrow, see sagitta.trust.
+        """
+        self._trusting = bool(enabled)
+        self._compile()
+
+    def add_hook(self, event, hook):
+        """
+        Add a hook for an event of this arrow, see sagitta.hooks.
+        """
+        hooks.validate(event)
+        self._hooks[event] = self._hooks.get(event, []) + [hook]
+        self._compile()
+
+    def remove_hook(self, event, hook):
+        hooks.validate(event)
+        self._hooks[event] = [added for added in self._hooks.get(event, []) if added is not hook]
+        self._compile()
+
+    def statistics(self):
+        """
+        Statistics of the calls as a plain dictionary.
+        """
+        result = {}
+        if self._statistics is not None:
+            result.update(self._statistics.snapshot())
+        if self._sampler is not None:
+            result['sampling'] = self._sampler.statistics()
+        return result
+
+    def _compile(self):
+        self._call = self._remember(self._call_path())
+        self._trusted = None
+        for dependent in list(self._dependents or ()):
+            dependent._restage(self)
+
+    def _call_path(self):
+        fun = self._target()
+        if not self._checking:
+            return fun
+        elif self._sampler is not None:
+            return disguise(self._sampler.wrap(fun, compile_arrow(self)), self._fun)
+        return compile_arrow(self)
+
+    def _target(self):
+        """
+        The function called by the call paths.
+        """
+        return self._fun
+
+    def _depend(self, dependent):
+        """
+        Notify the dependent (a pipeline) when this arrow is recompiled.
+        """
+        if self._dependents is None:
+            self._dependents = weakref.WeakSet()
+        self._dependents.add(dependent)
+
+    def _trusted_call(self):
+        """
+        Call path that trusts its first argument to be of the declared type,
+        for stages whose argument is guaranteed by the previous stage.
+        """
+        if not self._checking or self._sampler is not None:
+            return self._call
+        if self._trusted is None:
+            self._trusted = self._remember(compile_arrow(self, trusted=(0,)))
+        return self._trusted
+
+    def _remember(self, function):
+        """
+        Remember the code of a call path generated for this arrow, so that
+        profiles can tell the arrows over the same function apart.
+        """
+        code = getattr(function, '__code__', None)
+        if code is not None and code.co_filename == filename(self._fun):
+            self._paths[id(code)] = code  # <- equal code of the same source is not the same
+        return function
+
+    def _record(self, types):
+        """
+        Add a tuple of validated argument types to the inline cache and
+        recompile the call path with it.
 
-        composition = self.compose(self._fun, other._fun)
+        When the cache is full, the arrow is recompiled as megamorphic,
+        without the recording, so that it does not thrash the cache.
+        """
+        if types in self._inline_cache or self._megamorphic:
+            return
+        if len(self._inline_cache) < INLINE_CACHE_SIZE:
+            self._inline_cache = self._inline_cache + [types]
+        else:
+            self._megamorphic = True
+        self._compile()
+
+    def check(self, value, expected, bindings=None):
+        """
+        Check that value is of the expected type, see signature.check.
+        """
+        return self.signature.check(value, expected, bindings)
+
+    def map(self, iterable, into=None):
+        """
+        Apply the arrow to each value of iterable.
+
+        See starmap.
+        """
+        return self.starmap(((value,) for value in iterable), into)
 
-        common_types.insert(0, composition)
-        common_types.append(other.signature.types[-1])
-        return arrow(*common_types)
+    def starmap(self, iterable, into=None):
+        """
+        Apply the arrow to each tuple of arguments in iterable.
+
+        The arguments are checked only once for each distinct tuple of
+        argument types and the return value once for each distinct return
+        type, the rest of the calls go directly to the typed function.
+        Containers are checked on every call, and the arrows with statistics,
+        hooks or Iterator types are called through their checked call path.
+
+        Returns a lazy iterator of the results, or the results collected
+        with into, which can be any callable taking an iterable,
+        for example list or functools.partial(array.array, 'd').
+        """
+        if self._awaits:
+            raise TypeError("Can not map coroutine function {0}, await its calls instead.".format(self))
+        results = self._starmap(iterable)
+        return results if into is None else into(results)
+
+    def stream(self, iterable, chunk=256, pool=None, ahead=2):
+        """
+        Push the values of iterable through the stages of the arrow in
+        chunks, checking once per chunk for each distinct type.
+
+        Returns a lazy iterator of the results, see sagitta.stream.
+        """
+        from sagitta import stream
+        return stream.runner(self, chunk, pool, ahead)(iterable)
+
+    def _starmap(self, iterable):
+        if self._validators is None:
+            self._validators = compile_validators(self.signature)
+        validate_args, validate_call = self._validators
+        fun = self._fun
+        returns_by_args = {}
+
+        if not self._checking or self._traced():
+            # Unchecked arrows call the function directly, and the call
+            # path records statistics, calls hooks and wraps lazy iterators
+            call = self._call
+            for args in iterable:
+                yield call(*args)
+            return
+
+        # The types of containers say nothing of their elements
+        containers = [isinstance(typeclass, Container) for typeclass in self.signature.types]
+        every_args, every_call = any(containers[:-1]), any(containers)
+
+        for args in iterable:
+            key = tuple(type(arg) for arg in args)
+            returns = returns_by_args.get(key)
+            if returns is None or every_args:
+                validate_args(args)
+                returns = returns_by_args[key] = set()
+            result = fun(*args)
+            if type(result) not in returns or every_call:
+                validate_call(args, result)
+                returns.add(type(result))
+            yield result
+
+    def _traced(self):
+        """
+        Does every call need the call path: for the statistics, calling the
+        hooks, or wrapping lazy iterators.
+        """
+        return (
+            self._statistics is not None or
+            any(hooks.hooks(self, event) for event in hooks.EVENTS) or
+            any(islazy(typeclass) for typeclass in self.signature.types)
+        )
+
+    def _stages(self):
+        return [self]
+
+    def _children(self):
+        """
+        The arrows this arrow is composed of, see sagitta.graph.
+        """
+        return []
+
+    def _arguments(self):
+        """
+        Arguments to build a copy of the arrow with, see __reduce__.
+        """
+        return (self._fun,) + tuple(self.signature.types), self.signature.keywords()
+
+    def __reduce__(self):
+        """
+        Pickle the arrow as its typed function and signature, so that it can
+        be sent to other processes if the function can.
+
+        The copies are built without the hooks, statistics, sampling and
+        registration of the arrow. An arrow decorating a module level
+        function, in place of the function, is pickled by its name instead.
+        """
+        name = published(self)
+        if name is not None:
+            return lookup, name
+        args, kwargs = self._arguments()
+        return rebuild, (type(self), args, kwargs, self._checking)
+
+    def first(self, pool=None):
+        """
+        Arrow applying this arrow to the first value of a pair, and passing
+        the second value through, see sagitta.graph.
+        """
+        from sagitta import graph
+        return graph.first(self, pool)
+
+    def second(self, pool=None):
+        """
+        Arrow applying this arrow to the second value of a pair, and passing
+        the first value through.
+        """
+        from sagitta import graph
+        return graph.second(self, pool)
+
+    def split(self, other, pool=None):
+        """
+        Arrow applying this arrow and the other one to the values of a pair,
+        concurrently on the pool if given.
+        """
+        from sagitta import graph
+        return graph.split([self, other], pool)
+
+    def fanout(self, other, pool=None):
+        """
+        Arrow applying this arrow and the other one to the same value,
+        concurrently on the pool if given.
+        """
+        from sagitta import graph
+        return graph.fanout([self, other], pool)
+
+    def shared(self):
+        """
+        Copy of this composed arrow calling each of the arrows that appear
+        in it more than once only once for each argument, see sagitta.graph.
+        """
+        from sagitta import graph
+        return graph.shared(self)
+
+    def left(self):
+        """
+        Arrow applying this arrow to the values tagged Left, and passing
+        the values tagged Right through, see sagitta.either.
+        """
+        from sagitta import graph
+        return graph.left(self)
+
+    def right(self):
+        """
+        Arrow applying this arrow to the values tagged Right, and passing
+        the values tagged Left through.
+        """
+        from sagitta import graph
+        return graph.right(self)
+
+    def choice(self, other):
+        """
+        Arrow applying this arrow to the values tagged Left and the other
+        one to the values tagged Right, keeping the tags.
+        """
+        from sagitta import graph
+        return graph.choice([self, other])
+
+    def fanin(self, other):
+        """
+        Arrow applying this arrow to the values tagged Left and the other
+        one to the values tagged Right, and returning the results untagged.
+        """
+        from sagitta import graph
+        return graph.fanin([self, other])
+
+    def __mul__(self, other):
+        assert isinstance(other, arrow)
+        return self.split(other)
+
+    def __and__(self, other):
+        assert isinstance(other, arrow)
+        return self.fanout(other)
+
+    def __add__(self, other):
+        assert isinstance(other, arrow)
+        return self.choice(other)
+
+    def __or__(self, other):
+        assert isinstance(other, arrow)
+        return self.fanin(other)
+
+    def __rshift__(self, other):
+        """
+        Compose arrows into a pipeline, which calls the other arrow with the
+        return value of this arrow.
+        """
+        assert isinstance(other, arrow)
+        if self._awaits or other._awaits:
+            from sagitta import asynchronous
+            return asynchronous.awaiting([self, other])
+        return pipeline([self, other])
 
     def __lshift__(self, other):
-        assert isinstance(other, type(self))
+        assert isinstance(other, arrow)
         return other.__rshift__(self)
 
     @staticmethod
     def compose(f1, f2):
-        if not isinstance(f1, Callable):
+        if not callable(f1):
             raise StrictTypeError("'{0}' object is not callable.".format(type(f1).__name__))
-        if not isinstance(f2, Callable):
+        if not callable(f2):
             raise StrictTypeError("'{0}' object is not callable.".format(type(f2).__name__))
         def composition(*args, **kwargs):
             return f2(f1(*args, **kwargs))
@@ -131,7 +522,8 @@ class arrow(object):
                 '{0}={1}'.format(str(cls), classname(cat))
                 for cls, cat
                 in list(self.signature.constraints.items())
-            ]
+            ] +
+            self.signature.options()
         )
         return "{0}({1}, {2})".format(
             classname(self),
@@ -140,6 +532,36 @@ class arrow(object):
         )
 
 
+def published(arr):
+    """
+    The module and qualified name of the typed function of an arrow, when
+    the arrow is found by them, as it is for the decorated functions.
+    """
+    module = getattr(arr._fun, '__module__', None)
+    qualname = getattr(arr._fun, '__qualname__', None)
+    if module not in sys.modules or not qualname or '<locals>' in qualname:
+        return None
+    try:
+        found = lookup(module, qualname)
+    except AttributeError:
+        return None
+    return (module, qualname) if found is arr else None
+
+
+def lookup(module, qualname):
+    found = importlib.import_module(module)
+    for name in qualname.split('.'):
+        found = getattr(found, name)
+    return found
+
+
+def rebuild(cls, args, kwargs, checking):
+    arr = cls(*args, **kwargs)
+    if not checking:
+        arr.set_checking(False)
+    return arr
+
+
 class signature(object):
     """
     Haskell like function type signature.
@@ -148,13 +570,22 @@ class signature(object):
     to see if they are compatible.
 
     Last type is always the return type.
+
+    The elements option is the strategy for checking the elements of
+    containers, see sagitta.strategy.
     """
     def __init__(self, *types, **constraints):
 
         if len(types) < 2:
             raise TypeError("Needs at least two types: an input type and a return type.")
 
-        self.types = list(types)
+        self.types = [parse(typeclass) for typeclass in types]
+        self.elements = constraints.pop('elements', None) or strategy.full()
+        if not isinstance(self.elements, strategy.strategy):
+            raise TypeError("Expected a strategy for elements, got {0}.".format(self.elements))
+        for key in constraints:
+            if key.islower():
+                raise TypeError("Unknown option '{0}' for a signature.".format(key))
         self.constraints = dict(constraints)
 
     @property
@@ -165,9 +596,122 @@ class signature(object):
     def returns(self):
         return self.types[-1]
 
+    def check(self, value, expected, bindings=None):
+        """
+        Check that value is of the expected type.
+
+        Type variables are unified using the bindings dictionary, which
+        maps each type variable to the type it was first bound to.
+        The signature itself is never changed, so each call must use its
+        own bindings.
+
+        The expected type can be a container type expression, see
+        sagitta.container.
+        """
+        expected = parse(expected)
+        if isinstance(expected, Container):
+            bindings = {} if bindings is None else bindings
+            items = expected.items
+            if not issubclass(type(value), expected.origin) or (
+                    expected.origin is tuple and len(value) != len(items)):
+                raise StrictTypeError(
+                    "Argument '{0}' {1} is of wrong type for {3}, expected {2}."
+                    "".format(value, type(value), classname(expected), self)
+                )
+            if islazy(expected):
+                pairs = []  # <- checked lazily, see sagitta.container.lazy
+            elif expected.origin is tuple:
+                pairs = zip(value, items)
+            elif expected.origin is dict:
+                pairs = [(element, items[i]) for pair in value.items() for i, element in enumerate(pair)]
+            else:
+                pairs = ((element, items[0]) for element in value)
+            for element, item in pairs:
+                self.check(element, item, bindings)
+        elif issubclass(expected, TypeVariable):
+            bindings = {} if bindings is None else bindings
+            if expected in bindings:
+                if not issubclass(type(value), bindings[expected]):
+                    raise StrictTypeError(
+                        "Expected argument '{0}' {1} to be of type {2}."
+                        "".format(value, type(value), bindings[expected])
+                    )
+            else:
+                constraint = self.constraint(expected)
+                if constraint is not None and not issubtype(type(value), constraint):
+                    raise StrictTypeError(
+                        "Expected argument '{0}' {1} to be of type {2}."
+                        "".format(value, type(value), constraint)
+                    )
+                bindings[expected] = type(value)
+        elif not issubtype(type(value), expected):
+            raise StrictTypeError(
+                "Argument '{0}' {1} is of wrong type for {3}, expected {2}."
+                "".format(value, type(value), expected, self)
+            )
+        return value
+
+    def options(self):
+        """
+        The options differing from the defaults, formatted.
+        """
+        if self.elements == strategy.full():
+            return []
+        return ['elements={0!r}'.format(self.elements)]
+
+    def keywords(self):
+        """
+        The constraints and options, to build a copy of the signature with.
+        """
+        keywords = dict(self.constraints)
+        keywords['elements'] = self.elements
+        return keywords
+
+    def constraint(self, typevar):
+        """
+        The category constraining a type variable, or None.
+        """
+        return self.constraints.get(typevar.__name__)
+
+    def resolve(self, typeclass):
+        """
+        The category of a type of this signature, used outside of it:
+        type variables are taken as their constraints, or object.
+        """
+        if issubclass(typeclass, TypeVariable):
+            return self.constraint(typeclass) or object
+        return typeclass
+
+    def guarantees(self, other, index=0):
+        """
+        Does the declared return type of this signature guarantee that the
+        return value is of the type of the argument at index of the other
+        signature, so that checking the argument adds no safety.
+
+        Type variables are taken as their constraints: an unconstrained
+        type variable argument accepts any value, and an unconstrained
+        return type variable guarantees nothing.
+        """
+        returns, expected = self.returns, other.args[index]
+        if issubclass(expected, TypeVariable):
+            if expected in other.args[:index]:
+                return False  # <- checked against the earlier binding
+            expected = other.constraint(expected)
+            if expected is None:
+                return True
+        if issubclass(returns, TypeVariable):
+            returns = self.constraint(returns)
+            if returns is None:
+                return False
+        return issubtype(returns, expected)
+
     def __eq__(self, other):
         if isinstance(self, other.__class__):
-            return self.types == other.types and self.constraints == other.constraints
+            return (
+                self.types == other.types and
+                self.constraints == other.constraints and
+                self.elements == other.elements
+            )
         return NotImplemented
 
     def __hash__(self):
@@ -182,6 +726,180 @@ class signature(object):
                     '{0}={1}'.format(str(cls), classname(cat))
                     for (cls, cat)
                     in list(self.constraints.items())
-                ]
+                ] +
+                self.options()
             )
         )
+
+
+class pipeline(arrow):
+    """
+    Composition of arrows as a flat list of stages.
+
+    A pipeline calls its stages one after another in a single loop, each
+    with the return value of the previous one. Composing a pipeline with
+    another arrow or pipeline extends the list instead of nesting, so the
+    stack depth does not grow with the number of stages.
+
+    The stages check their own arguments and return values, so the
+    pipeline checks nothing by itself, unless it has statistics, hooks
+    or sampling of its own.
+
+    When composed, the declared return type of each stage is compared with
+    the argument type of the next stage, and the stages whose argument is
+    guaranteed by the previous stage are called without checking it.
+    """
+    def __init__(self, stages):
+        stages = list(stages)
+        for arr in stages[1:]:
+            # The later stages of a pipeline have been checked already
+            stage = arr._stages()[0]
+            if len(stage.signature.args) != 1:
+                raise StrictTypeError(
+                    "Can not compose {0}, it takes {1} arguments instead of one."
+                    "".format(stage, len(stage.signature.args))
+                )
+        self.stages = [stage for arr in stages for stage in arr._stages()]
+        if len(self.stages) < 2:
+            raise TypeError("Needs at least two stages to compose.")
+
+        # Prepared on the first call, so that the intermediate pipelines of
+        # long chains of compositions cost only their list of stages
+        self.proven = None
+        self._calls = []
+
+        first, last = self.stages[0], self.stages[-1]
+        # Type variables of the last stage are not bound by the arguments
+        # of the first stage
+        returns = last.signature.resolve(last.signature.returns)
+        arrow.__init__(
+            self, self._run(self._calls, self._prepare),
+            *(first.signature.args + [returns]),
+            **first.signature.constraints
+        )
+
+    def _prepare(self):
+        """
+        Prove which stages get their argument guaranteed by the previous
+        stage, and compile the calls of the stages.
+        """
+        self.proven = [False] + [
+            previous.signature.guarantees(stage.signature)
+            for previous, stage in zip(self.stages, self.stages[1:])
+        ]
+        self._calls[:] = [self._stage_call(i) for i in range(len(self.stages))]
+        for stage in self.stages:
+            stage._depend(self)
+
+    @staticmethod
+    def _run(calls, prepare=None):
+        """
+        Function calling the stages in a loop.
+
+        The calls are read from the list on every call, so that they can be
+        replaced in place when the stages are recompiled.
+        """
+        def run(*args):
+            if not calls:
+                prepare()
+            stages = iter(calls)
+            value = next(stages)(*args)
+            for stage in stages:
+                value = stage(value)
+            return value
+
+        run.__name__ = 'pipeline'
+        return run
+
+    def _stage_call(self, i):
+        stage = self.stages[i]
+        return stage._trusted_call() if self._proves(i) else stage._call
+
+    def _proves(self, i):
+        """
+        Is the argument of the stage at index i guaranteed now: declared by
+        the previous stage, which also checks every return value.
+        """
+        previous = self.stages[i - 1]
+        return self.proven[i] and previous._checking and previous._sampler is None
+
+    def _restage(self, stage):
+        if not self._calls:
+            return
+        for i, staged in enumerate(self.stages):
+            if staged is stage:
+                self._calls[i] = self._stage_call(i)
+                if i + 1 < len(self.stages):
+                    # The proof of the next stage depends on this one
+                    self._calls[i + 1] = self._stage_call(i + 1)
+
+    def _stages(self):
+        return list(self.stages)
+
+    def _arguments(self):
+        return (self.stages,), {}
+
+    def _children(self):
+        return list(self.stages)
+
+    def _with(self, stages):
+        return pipeline(stages)
+
+    def _call_path(self):
+        if not self._checking:
+            return self._run([stage._fun for stage in self.stages])
+        elif self._sampler is None and self._statistics is None and not any(
+                hooks.hooks(self, event) for event in hooks.EVENTS):
+            return self._fun
+        return arrow._call_path(self)
+
+    def __repr__(self):
+        return "{0}({1})".format(
+            classname(self),
+            ' >> '.join(repr(stage) for stage in self.stages)
+        )
+
+
+class recursive(arrow):
+    """
+    Arrow of a recursive function, checked only at the outermost entry.
+
+    While the arrow is active in a thread, the recursive calls go to the
+    typed function directly, so they are not checked again and do not add
+    the frames of the checked call path, see sagitta.recursion.
+
+    With recursion='trampoline', the function must call the arrow only in
+    tail position. The recursive calls return a TailCall, which the
+    outermost entry calls in a loop, see sagitta.recursion.
+    """
+    def __init__(self, fun, *types, **constraints):
+        self.recursion = constraints.pop('recursion', recursion.OUTERMOST)
+        recursion.validate(self.recursion)
+        if iscoroutinefunction(fun):
+            raise TypeError("Can not check the recursion of coroutine function {0}.".format(fun.__name__))
+        self._active = recursion.Active()
+        if self.recursion == recursion.TRAMPOLINE:
+            self._inner = recursion.tail_call
+            self._bounce = recursion.trampoline(fun)
+        else:
+            self._inner = self._bounce = recursion.rebound(fun)
+        arrow.__init__(self, fun, *types, **constraints)
+
+    def _enter(self):
+        return self._inner if self._active.entered else self._call
+
+    __call__ = property(_enter)
+
+    def _target(self):
+        return self._bounce
+
+    def _call_path(self):
+        return disguise(recursion.outermost(arrow._call_path(self), self._active), self._fun)
+
+    def _trusted_call(self):
+        return self._call
+
+    def _arguments(self):
+        args, kwargs = arrow._arguments(self)
+        kwargs['recursion'] = self.recursion
+        return args, kwargs
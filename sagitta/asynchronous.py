@@ -0,0 +1,83 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Arrows of coroutine functions
+
+An arrow of an async def function is a coroutine function, which checks
+the arguments and the awaited result of the function when it is awaited:
+
+    @typed(str, bytes)
+    async def fetch(url):
+        ...
+
+    body = await fetch('http://example.com/')
+
+Composing an arrow of a coroutine function with >> gives an awaiting
+pipeline, which awaits the results of the coroutine stages and calls the
+other stages directly. Each call of the pipeline is a coroutine of its
+own, so many calls can be in flight at the same time in one event loop,
+overlapping their I/O, for example with gather.
+
+This module uses the async syntax of Python 3.5, and is imported only
+when arrows of coroutine functions are composed.
+"""
+
+import asyncio
+
+from sagitta.arrow import pipeline
+from sagitta.inspect import classname
+
+
+class awaiting(pipeline):
+    """
+    Pipeline of stages some of which are coroutine functions, called
+    with await.
+    """
+    def _run(self, calls, prepare=None):
+        """
+        Coroutine function calling the stages in a loop, awaiting the
+        results of the coroutine stages.
+        """
+        awaits = [stage._awaits for stage in self.stages]
+
+        async def run(*args):
+            if not calls:
+                prepare()
+            stages = iter(zip(calls, awaits))
+            call, awaited = next(stages)
+            value = call(*args)
+            if awaited:
+                value = await value
+            for call, awaited in stages:
+                value = call(value)
+                if awaited:
+                    value = await value
+            return value
+
+        run.__name__ = classname(self)
+        return run
+
+    def _with(self, stages):
+        return awaiting(stages)
+
+
+async def gather(arr, iterable, limit=None):
+    """
+    Call the arrow with each value of iterable concurrently, with at most
+    limit calls in flight, and return the results in order.
+    """
+    if limit is None:
+        return await asyncio.gather(*[arr(value) for value in iterable])
+    semaphore = asyncio.Semaphore(limit)
+
+    async def call(value):
+        async with semaphore:
+            return await arr(value)
+
+    return await asyncio.gather(*[call(value) for value in iterable])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Benchmark baselines and regression comparison
+
+A baseline stores the benchmark results together with metadata of the
+environment they were run in. Later runs are compared against it by the
+overhead of each benchmark, that is the time of the arrow relative to the
+typed function measured in the same repeat, which cancels out most of the
+differences in machine load between the runs.
+
+A benchmark has regressed when the median overhead has grown more than the
+threshold percentage, and the confidence intervals of the medians do not
+overlap. The intervals cover only the spread within a run, so sagitta.bench
+confirms each regression with more runs before reporting it.
+"""
+
+import json
+import platform
+import sys
+import time
+
+
+COMPARABLE = ('python', 'implementation', 'machine', 'processor')
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+
+def environment():
+    """
+    Metadata of the environment the benchmarks are run in.
+    """
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'executable': sys.executable,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def mismatch(saved):
+    """
+    Keys of the environment metadata that make the saved results hard to
+    compare with results from this environment.
+    """
+    current = environment()
+    return [key for key in COMPARABLE if saved.get(key) != current[key]]
+
+
+def save(path, results, **options):
+    with open(path, 'w') as out:
+        json.dump({
+            'environment': environment(),
+            'options': options,
+            'results': results,
+        }, out, indent=2, sort_keys=True)
+        out.write('\n')
+
+
+def load(path):
+    with open(path) as source:
+        return json.load(source)
+
+
+def binomial_cdf(k, n):
+    """
+    Probability of at most k successes in n fair coin tosses.
+    """
+    total = 0
+    coefficient = 1
+    for i in range(k + 1):
+        total += coefficient
+        coefficient = coefficient * (n - i) // (i + 1)
+    return total / 2.0 ** n
+
+
+def median_interval(values, confidence=0.95):
+    """
+    Distribution free confidence interval of the median from the order
+    statistics of the values.
+
+    With too few values for the confidence, the interval is from the
+    smallest to the largest value.
+    """
+    ordered = sorted(values)
+    n = len(ordered)
+    alpha = (1.0 - confidence) / 2.0
+    k = 0
+    while k < n // 2 and binomial_cdf(k, n) <= alpha:
+        k += 1
+    low = max(k - 1, 0)
+    return ordered[low], ordered[n - 1 - low]
+
+
+def overheads(result):
+    """
+    Overhead of the arrow in each repeat of a benchmark result.
+    """
+    return [typed / raw for raw, typed in zip(result['raw'], result['arrow'])]
+
+
+def compare(baseline, results, threshold=10.0, confidence=0.95):
+    """
+    Compare the results against the baseline results.
+
+    Returns a list of comparisons as plain dictionaries, with regressed set
+    for the benchmarks that are slower than the baseline by more than the
+    threshold percentage.
+    """
+    before = dict((result['name'], result) for result in baseline['results'])
+    comparisons = []
+
+    for result in results:
+        old = before.get(result['name'])
+        if old is None or 'error' in old or 'error' in result:
+            continue
+
+        old_overheads, new_overheads = overheads(old), overheads(result)
+        old_median, new_median = median(old_overheads), median(new_overheads)
+        old_low, old_high = median_interval(old_overheads, confidence)
+        new_low, new_high = median_interval(new_overheads, confidence)
+        change = 100.0 * (new_median - old_median) / old_median
+
+        comparisons.append({
+            'name': result['name'],
+            'baseline': old_median,
+            'baseline_interval': [old_low, old_high],
+            'current': new_median,
+            'current_interval': [new_low, new_high],
+            'change': change,
+            'regressed': change > threshold and new_low > old_high,
+        })
+    return comparisons
+
+
+def report(comparisons, out=None):
+    out = out or sys.stdout
+    for comparison in comparisons:
+        out.write('{0:<32} {1:8.2f}x -> {2:8.2f}x {3:+8.1f}%{4}\n'.format(
+            comparison['name'],
+            comparison['baseline'],
+            comparison['current'],
+            comparison['change'],
+            '  REGRESSION' if comparison['regressed'] else '',
+        ))
@@ -0,0 +1,295 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Benchmarks of the overhead of arrows
+
+Measures the time of calling arrows against calling the typed functions
+directly, and of building arrows against building their signatures,
+and writes the results as JSON:
+
+    python -m sagitta.bench [--output FILE] [--group GROUP ...]
+
+The times are in seconds per call, one time for each repeat.
+
+The results can be saved as a baseline, and later runs compared against it,
+see sagitta.baseline:
+
+    python -m sagitta.bench --save-baseline FILE
+    python -m sagitta.bench --compare FILE [--threshold PERCENT]
+
+The comparison exits with status 1 if any benchmark has regressed, in
+the run and in the runs confirming it.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+import timeit
+
+from sagitta import baseline
+from sagitta.arrow import arrow, signature
+from sagitta.baseline import median
+from sagitta.cat import Int
+from sagitta.exceptions import StrictTypeError
+from sagitta.typevar import A
+
+
+ARITIES = range(1, 9)
+KINDS = ('class', 'category', 'typevar', 'constrained')
+DEPTHS = (1, 10, 100, 1000)
+
+
+def first(*args):
+    return args[0]
+
+
+def increment(x):
+    return x + 1
+
+
+def guarded(x):
+    if not isinstance(x, int):
+        raise TypeError('Expected an int.')
+    return x
+
+
+def types_for(kind, arity):
+    """
+    Argument and return types and constraints for a kind of signature.
+    """
+    typeclass = {
+        'class': int,
+        'category': Int,
+        'typevar': A,
+        'constrained': A,
+    }[kind]
+    constraints = {'A': Int} if kind == 'constrained' else {}
+    return [typeclass] * (arity + 1), constraints
+
+
+def calibrate(timer, min_time):
+    """
+    Number of calls taking at least min_time, and the time they took.
+    """
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 10 ** 7:
+            return number, elapsed
+        number *= 10 if elapsed < min_time / 10 else 2
+
+
+def per_call(fun, repeat=5, min_time=0.05):
+    """
+    Times in seconds per call of fun, for each repeat.
+
+    The number of calls in a repeat grows until it takes at least min_time.
+    """
+    timer = timeit.Timer(fun)
+    number, elapsed = calibrate(timer, min_time)
+    return [elapsed / number] + [
+        timer.timeit(number) / number for _ in range(repeat - 1)
+    ]
+
+
+def paired(raw, typed, repeat=5, min_time=0.05):
+    """
+    Times in seconds per call of raw and of typed, for each repeat.
+
+    The two are measured one after the other in each repeat, so that the
+    changes in the load of the machine during a run affect both alike.
+    """
+    timers = [timeit.Timer(raw), timeit.Timer(typed)]
+    numbers = [calibrate(timer, min_time)[0] for timer in timers]
+    times = ([], [])
+    for _ in range(repeat):
+        for timer, number, measured in zip(timers, numbers, times):
+            measured.append(timer.timeit(number) / number)
+    return times
+
+
+def raising(fun, *args):
+    def call():
+        try:
+            fun(*args)
+        except TypeError:
+            pass
+    return call
+
+
+def arity_cases():
+    for kind in KINDS:
+        for arity in ARITIES:
+            types, constraints = types_for(kind, arity)
+            args = (1,) * arity
+            typed = arrow(first, *types, **constraints)
+            yield (
+                'arity={0} {1}'.format(arity, kind),
+                {'arity': arity, 'kind': kind},
+                lambda args=args: first(*args),
+                lambda typed=typed, args=args: typed(*args),
+            )
+
+
+def composition_cases():
+    for operator in ('>>', '<<'):
+        for depth in DEPTHS:
+            composed = arrow(increment, Int, Int)
+            for _ in range(depth - 1):
+                stage = arrow(increment, Int, Int)
+                composed = composed >> stage if operator == '>>' else stage << composed
+
+            def raw(depth=depth):
+                x = 0
+                for _ in range(depth):
+                    x = increment(x)
+                return x
+
+            yield (
+                'depth={0} {1}'.format(depth, operator),
+                {'depth': depth, 'operator': operator},
+                raw,
+                lambda composed=composed: composed(0),
+            )
+
+
+def failure_cases():
+    for kind in ('class', 'category', 'constrained'):
+        types, constraints = types_for(kind, 1)
+        typed = arrow(guarded, *types, **constraints)
+        yield (
+            'failing {0}'.format(kind),
+            {'kind': kind},
+            raising(guarded, 'a'),
+            raising(typed, 'a'),
+        )
+
+
+def signature_cases():
+    for kind in KINDS:
+        for arity in (1, 4, 8):
+            types, constraints = types_for(kind, arity)
+            yield (
+                'build arity={0} {1}'.format(arity, kind),
+                {'arity': arity, 'kind': kind},
+                lambda types=types, constraints=constraints: signature(*types, **constraints),
+                lambda types=types, constraints=constraints: arrow(first, *types, **constraints),
+            )
+
+
+GROUPS = {
+    'arity': arity_cases,
+    'composition': composition_cases,
+    'failure': failure_cases,
+    'signature': signature_cases,
+}
+
+
+def run(groups=None, repeat=5, min_time=0.05, names=None):
+    """
+    Run the benchmarks of the groups, or all of them, or only the ones
+    with the names.
+
+    Returns a list of results as plain dictionaries.
+    """
+    results = []
+    for group in groups or sorted(GROUPS):
+        for name, params, raw, typed in GROUPS[group]():
+            if names is not None and name not in names:
+                continue
+            result = {'group': group, 'name': name, 'params': params}
+            try:
+                result['raw'], result['arrow'] = paired(raw, typed, repeat, min_time)
+            except (RuntimeError, StrictTypeError) as err:
+                # Deep compositions may exceed the recursion limit
+                result['error'] = '{0}: {1}'.format(type(err).__name__, err)
+            else:
+                result['overhead'] = median(result['arrow']) / median(result['raw'])
+            results.append(result)
+    return results
+
+
+def confirm(comparisons, saved, options):
+    """
+    Run the regressed benchmarks again, and keep only the regressions that
+    every run confirms.
+
+    The times vary more between runs than within a run, so a regression
+    seen in one run only is noise.
+    """
+    regressed = set(comparison['name'] for comparison in comparisons if comparison['regressed'])
+    for _ in range(options.confirm):
+        if not regressed:
+            break
+        again = run(options.group, options.repeat, options.min_time, names=regressed)
+        regressed = set(
+            comparison['name']
+            for comparison in baseline.compare(saved, again, options.threshold, options.confidence)
+            if comparison['regressed']
+        )
+    for comparison in comparisons:
+        comparison['regressed'] = comparison['name'] in regressed
+
+
+def parser():
+    parse = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parse.add_argument('--output', '-o', help='write the results to a file instead of stdout')
+    parse.add_argument('--group', '-g', action='append', choices=sorted(GROUPS),
+                       help='run only the benchmarks of a group, can be repeated')
+    parse.add_argument('--repeat', '-r', type=int, default=5,
+                       help='number of times to repeat each measurement')
+    parse.add_argument('--min-time', '-t', type=float, default=0.05,
+                       help='minimum time in seconds of each measurement')
+    parse.add_argument('--save-baseline', metavar='FILE',
+                       help='save the results with environment metadata as a baseline')
+    parse.add_argument('--compare', metavar='FILE',
+                       help='compare the results against a saved baseline')
+    parse.add_argument('--threshold', type=float, default=10.0,
+                       help='percentage of slowdown considered a regression (default 10)')
+    parse.add_argument('--confirm', type=int, default=2,
+                       help='number of runs confirming each regression (default 2)')
+    parse.add_argument('--confidence', type=float, default=0.95,
+                       help='confidence level of the intervals of the medians (default 0.95)')
+    return parse
+
+
+def main(argv=None):
+    options = parser().parse_args(argv)
+    results = run(options.group, options.repeat, options.min_time)
+
+    if options.save_baseline:
+        baseline.save(
+            options.save_baseline, results,
+            repeat=options.repeat, min_time=options.min_time,
+        )
+    if options.compare:
+        saved = baseline.load(options.compare)
+        for key in baseline.mismatch(saved['environment']):
+            sys.stderr.write('Warning: baseline {0} differs: {1} != {2}\n'.format(
+                key, saved['environment'].get(key), baseline.environment()[key],
+            ))
+        comparisons = baseline.compare(saved, results, options.threshold, options.confidence)
+        confirm(comparisons, saved, options)
+        baseline.report(comparisons)
+        return 1 if any(comparison['regressed'] for comparison in comparisons) else 0
+
+    if options.output or not options.save_baseline:
+        output = json.dumps(results, indent=2, sort_keys=True)
+        if options.output:
+            with open(options.output, 'w') as out:
+                out.write(output + '\n')
+        else:
+            print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,6 +14,12 @@
 from abc import ABCMeta, abstractmethod
 from numbers import Number, Complex, Real, Rational, Integral
 
+try:
+    from abc import get_cache_token
+except ImportError:  # Python < 3.4
+    def get_cache_token():
+        return ABCMeta._abc_invalidation_counter
+
 
 # Aliases
 Bool = bool  # Can not be subtyped
@@ -74,3 +80,46 @@ for (cat, sub) in [
     (Arrow, Monad),
 ]:
     ABCMeta.register(cat, sub)
+
+
+# Memoized subtype checks
+
+SUBTYPE_CACHE_SIZE = 4096
+
+# Registering virtual subclasses can only add subtypes, so positive results
+# stay valid and only the negative results need to be invalidated.
+subtypes = set()
+not_subtypes = set()
+_not_subtypes_token = get_cache_token()
+
+
+def issubtype(cls, cat):
+    """
+    Memoized issubclass(cls, cat) for checking concrete types against
+    categories, which for ABCMeta categories is much slower than for
+    plain classes.
+
+    The memo is shared by the whole process. It is invalidated whenever
+    ABCMeta.register adds new virtual subclasses, and it is cleared when
+    it reaches SUBTYPE_CACHE_SIZE entries, so that dynamically created
+    classes can not grow it without limit.
+    """
+    global _not_subtypes_token  # pylint: disable=W0603
+
+    key = (cls, cat)
+    if key in subtypes:
+        return True
+
+    token = get_cache_token()
+    if token != _not_subtypes_token:
+        not_subtypes.clear()
+        _not_subtypes_token = token
+    elif key in not_subtypes:
+        return False
+
+    result = issubclass(cls, cat)
+    memo = subtypes if result else not_subtypes
+    if len(memo) >= SUBTYPE_CACHE_SIZE:
+        memo.clear()
+    memo.add(key)
+    return result
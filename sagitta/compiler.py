@@ -0,0 +1,657 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Compilation of type signatures into specialized call paths
+
+Instead of interpreting the signature on every call, each arrow gets
+a function generated for its signature: the arity is fixed, the types
+are bound to local constants and the checks are unrolled, so that
+a call costs about the same as a hand written isinstance guard.
+
+Type variables are bound in local variables of the generated function,
+so every call unifies them in its own frame without allocating anything
+and without sharing state with concurrent calls.
+
+Container types get their elements checked in loops, which skip the
+checks of an element of the same type as the previous one, so that a list
+of a million ints costs a type comparison per element instead of a subtype
+check. The type variables of the elements are bound once for the whole
+call, like those of the arguments. The signature can limit the elements
+checked, see sagitta.strategy.
+
+Signatures with categories or type variables also get a polymorphic
+inline cache: the tuples of argument types seen by the arrow are compiled
+into the call path as identity tests, so that a hit skips the argument
+checks altogether. After INLINE_CACHE_SIZE different tuples the arrow is
+considered megamorphic and stops caching. Signatures with containers are
+not cached, as the types of the containers say nothing of the elements.
+
+Timing for the statistics of an arrow, and calls to the hooks of an arrow,
+are compiled in only when the statistics are enabled or there are hooks.
+Likewise the tests for trusted values, see sagitta.trust.
+
+The generated functions are named after the typed functions, so that
+profilers see the arrows as separate frames.
+"""
+
+from abc import ABCMeta
+from itertools import islice
+
+from sagitta.cat import issubtype, subtypes
+from sagitta.container import Container, islazy, lazy, typevars
+from sagitta.exceptions import StrictTypeError
+from sagitta.hooks import failing, hooks
+from sagitta.inspect import classname, qualified_name
+from sagitta.stats import ARGS, CALLS, FUN, RETURNS, clock
+from sagitta.strategy import choose, deadline
+from sagitta.trust import guaranteed, record
+from sagitta.typevar import TypeVariable
+
+
+INLINE_CACHE_SIZE = 4
+BUDGET_INTERVAL = 256  # <- a power of two
+
+
+def arity_error(args, sig, kwargs=None):
+    if kwargs:
+        return StrictTypeError(
+            "Wrong number of arguments in '{0}' and keyword arguments {1} for {2}."
+            "".format(args, sorted(kwargs), sig)
+        )
+    return StrictTypeError(
+        "Wrong number of arguments in '{0}' for {1}."
+        "".format(args, sig)
+    )
+
+
+def type_error(value, expected, sig):
+    return StrictTypeError(
+        "Argument '{0}' {1} is of wrong type for {3}, expected {2}."
+        "".format(value, type(value), expected, sig)
+    )
+
+
+def typevar_error(value, expected):
+    return StrictTypeError(
+        "Expected argument '{0}' {1} to be of type {2}."
+        "".format(value, type(value), expected)
+    )
+
+
+def element_error(value, expected, sig, container):
+    return StrictTypeError(
+        "Element '{0}' {1} of {4} is of wrong type for {3}, expected {2}."
+        "".format(value, type(value), expected, sig, type(container))
+    )
+
+
+ERRORS = ('arity_error', 'type_error', 'typevar_error', 'element_error')
+
+
+class Source(object):
+    """
+    Source code of a generated function and the namespace of constants
+    it refers to.
+    """
+    def __init__(self, sig):
+        self.sig = sig
+        self.lines = []
+        self.namespace = {
+            'sig': sig,
+            'arity_error': arity_error,
+            'type_error': type_error,
+            'typevar_error': typevar_error,
+            'element_error': element_error,
+            'subtypes': subtypes,
+            'issubtype': issubtype,
+        }
+        self.bindings = {}
+        self.optional = set()  # <- slots bound by elements, None until then
+        self.within = []
+        self.count = 0
+        self.shared = []  # <- type variables bound lazily
+        self.seeded = set()
+        self.pending = []
+        self.timed = False
+        self.awaits = False
+        self.hooks = {}
+        self.trusting = False
+
+    def __str__(self):
+        return '\n'.join(self.lines) + '\n'
+
+    def emit(self, line, indent=1):
+        self.lines.append('    ' * indent + line)
+
+    def const(self, name, value):
+        """
+        Bind value to name in the namespace of the generated function.
+        """
+        self.namespace[name] = value
+        return name
+
+    def local(self, prefix):
+        """
+        Name of a new local variable.
+        """
+        self.count += 1
+        return '{0}{1}'.format(prefix, self.count)
+
+    def fail(self, value, name):
+        """
+        Statement raising the error for value not being of the type bound
+        to name.
+        """
+        if self.within:
+            return 'raise element_error({0}, {1}, sig, {2})'.format(value, name, self.within[0])
+        return 'raise type_error({0}, {1}, sig)'.format(value, name)
+
+    def fail_typevar(self, value, name):
+        """
+        Statement raising the error for value not being of the type bound
+        to a type variable.
+        """
+        if self.within:
+            return self.fail(value, name)
+        return 'raise typevar_error({0}, {1})'.format(value, name)
+
+    def guard(self, value, typeclass, name, indent=1, trusted=False, trustable=False):
+        """
+        Emit lines checking that value is of the type bound to name.
+
+        A trusted value is known to be of the type already, so it only
+        binds the type variable it is the first occurrence of. A trustable
+        value is checked only when it is not the last value returned by a
+        trusting arrow, see sagitta.trust.
+        """
+        if issubclass(typeclass, TypeVariable):
+            if trusted and typeclass not in self.bindings:
+                slot = self.bindings[typeclass] = 'v{0}'.format(len(self.bindings))
+                self.emit('{0} = type({1})'.format(slot, value), indent)
+            else:
+                self.unify(value, typeclass, indent)
+        elif isinstance(typeclass, Container):
+            # Containers are always checked, their elements may have changed
+            self.container(value, typeclass, name, indent)
+        elif trusted:
+            pass
+        elif isinstance(typeclass, ABCMeta):
+            self.const(name, typeclass)
+            if trustable and self.trusting:
+                self.emit('if {0} is not last or ((proof, {1}) not in subtypes and'.format(value, name), indent)
+                self.emit('        not issubtype(proof, {0})):'.format(name), indent)
+                indent += 1
+            self.subtype(value, name, indent)
+            self.emit(self.fail(value, name), indent + 1)
+        else:
+            self.const(name, typeclass)
+            # The type and not isinstance, which trusts a spoofed __class__
+            self.emit('if type({0}) is not {1} and not issubclass(type({0}), {1}):'.format(value, name), indent)
+            self.emit(self.fail(value, name), indent + 1)
+
+    def container(self, value, typeclass, name, indent=1):
+        """
+        Emit lines checking that value is a container of the type bound to
+        name, and checking its elements.
+        """
+        self.const(name, typeclass)
+        origin = self.const(name + 'o', typeclass.origin)
+        self.emit('if not issubclass(type({0}), {1}):'.format(value, origin), indent)
+        self.emit(self.fail(value, name), indent + 1)
+        items = typeclass.items
+        if typeclass.origin is tuple:
+            self.emit('if len({0}) != {1}:'.format(value, len(items)), indent)
+            self.emit(self.fail(value, name), indent + 1)
+        if islazy(typeclass):
+            self.lazy(value, typeclass, name, indent)
+            return
+
+        if not self.within:
+            # The elements of the containers may bind type variables,
+            # unless they are empty
+            for typevar in typevars(typeclass):
+                if typevar not in self.bindings:
+                    slot = self.bindings[typevar] = 'v{0}'.format(len(self.bindings))
+                    self.optional.add(slot)
+                    self.emit('{0} = None'.format(slot), indent)
+
+        self.within.append(value)
+        if typeclass.origin is tuple:
+            elements = [self.local('e') for _ in items]
+            if elements:
+                self.emit('{0}, = {1}'.format(', '.join(elements), value), indent)
+            for i, (element, item) in enumerate(zip(elements, items)):
+                self.element(element, item, '{0}_{1}'.format(name, i), indent)
+        elif typeclass.origin is dict:
+            key, val = self.local('k'), self.local('e')
+            last_key, last_val = self.last(items[0], indent), self.last(items[1], indent)
+            self.loop('{0}, {1}'.format(key, val), '{0}.items()'.format(value), indent)
+            self.element(key, items[0], name + '_0', indent + 1, last_key)
+            self.element(val, items[1], name + '_1', indent + 1, last_val)
+        else:
+            element, last = self.local('e'), self.last(items[0], indent)
+            self.loop(element, value, indent)
+            self.element(element, items[0], name + '_0', indent + 1, last)
+        self.within.pop()
+
+    def loop(self, target, elements, indent=1):
+        """
+        Emit a loop over the elements chosen by the strategy of the
+        signature, see sagitta.strategy.
+        """
+        chosen = self.sig.elements
+        if chosen.random:
+            self.const('choose', choose)
+            elements = 'choose({0}, {1})'.format(elements, chosen.limit)
+        elif chosen.limit is not None:
+            self.const('islice', islice)
+            elements = 'islice({0}, {1})'.format(elements, chosen.limit)
+
+        if chosen.seconds is None:
+            self.emit('for {0} in {1}:'.format(target, elements), indent)
+            return
+        # Read the clock only every BUDGET_INTERVAL elements
+        ends, i = self.local('d'), self.local('i')
+        self.const('deadline', deadline)
+        self.const('clock', clock)
+        self.emit('{0} = deadline({1!r})'.format(ends, chosen.seconds), indent)
+        self.emit('for {0}, ({1}) in enumerate({2}):'.format(i, target, elements), indent)
+        self.emit('if not {0} & {1} and clock() > {2}:'.format(i, BUDGET_INTERVAL - 1, ends), indent + 1)
+        self.emit('break', indent + 2)
+
+    def lazy(self, value, typeclass, name, indent=1):
+        """
+        Wrap value in a lazy iterator checking its elements, after the
+        other values have been checked, see wrap.
+        """
+        self.pending.append((value, self.const(name + '_0', typeclass.items[0])))
+        for typevar in typevars(typeclass):
+            if typevar not in self.shared:
+                self.shared.append(typevar)
+
+    def wrap(self, indent=1):
+        """
+        Emit lines wrapping the values in lazy iterators.
+
+        The lazy iterators of a call share a dictionary of the bindings of
+        the type variables, which starts with the bindings known so far.
+        """
+        if not self.pending:
+            return
+        self.const('lazy', lazy)
+        self.const('check', self.sig.check)
+        if not self.seeded:
+            self.emit('b = {}', indent)
+        for typevar in self.shared:
+            if typevar in self.bindings and typevar not in self.seeded:
+                self.seeded.add(typevar)
+                slot, key = self.bindings[typevar], self.const('V' + typevar.__name__, typevar)
+                if slot in self.optional:
+                    self.emit('if {0} is not None:'.format(slot), indent)
+                    self.emit('b[{0}] = {1}'.format(key, slot), indent + 1)
+                else:
+                    self.emit('b[{0}] = {1}'.format(key, slot), indent)
+        self.seeded.update(self.shared)
+        for value, item in self.pending:
+            self.emit('{0} = lazy({0}, {1}, check, b)'.format(value, item), indent)
+        self.pending = []
+
+    def unshare(self, indent=1):
+        """
+        Emit lines taking the bindings of the type variables bound lazily
+        during the call into the local variables.
+        """
+        for typevar in self.shared:
+            key = self.const('V' + typevar.__name__, typevar)
+            self.seeded.add(typevar)
+            if typevar not in self.bindings:
+                slot = self.bindings[typevar] = 'v{0}'.format(len(self.bindings))
+                self.optional.add(slot)
+                self.emit('{0} = b.get({1})'.format(slot, key), indent)
+            elif self.bindings[typevar] in self.optional:
+                slot = self.bindings[typevar]
+                self.emit('if {0} is None:'.format(slot), indent)
+                self.emit('{0} = b.get({1})'.format(slot, key), indent + 1)
+
+    def last(self, typeclass, indent=1):
+        """
+        Emit a local variable for the type of the previous element, unless
+        the elements are containers, which are checked every time.
+        """
+        if isinstance(typeclass, Container):
+            return None
+        last = self.local('l')
+        self.emit('{0} = None'.format(last), indent)
+        return last
+
+    def element(self, value, typeclass, name, indent=1, last=None):
+        """
+        Emit lines checking an element, when its type is not the type of
+        the previous element kept in the local variable last.
+        """
+        if last is None or isinstance(typeclass, Container):
+            self.guard(value, typeclass, name, indent)
+            return
+        self.emit('if type({0}) is not {1}:'.format(value, last), indent)
+        self.guard(value, typeclass, name, indent + 1)
+        self.emit('{0} = type({1})'.format(last, value), indent + 1)
+
+    def call_hooks(self, event, args, indent=1):
+        """
+        Emit calls to the hooks of an event.
+        """
+        for i, hook in enumerate(self.hooks.get(event, ())):
+            name = self.const('{0}_{1}'.format(event, i), hook)
+            self.emit('{0}(arr, {1})'.format(name, args), indent)
+
+    def subtype(self, value, name, indent=1):
+        """
+        Emit a test for the type of value not being a subtype of the
+        category bound to name.
+
+        Consults the memo of subtypes before the slow ABC subclass check.
+        """
+        self.emit('if ((type({0}), {1}) not in subtypes and'.format(value, name), indent)
+        self.emit('        not issubtype(type({0}), {1})):'.format(value, name), indent)
+
+    def unify(self, value, typevar, indent=1):
+        """
+        Emit lines unifying value with a type variable.
+
+        The first occurrence of a type variable binds it to the type of
+        the value, and the later occurrences check against that binding.
+        """
+        if typevar in self.bindings:
+            slot = self.bindings[typevar]
+            test = 'if'
+            if slot in self.optional:
+                self.emit('if {0} is None:'.format(slot), indent)
+                self.bind(value, typevar, slot, indent + 1)
+                test = 'elif'
+            self.emit('{0} type({1}) is not {2} and not issubclass(type({1}), {2}):'.format(test, value, slot), indent)
+            self.emit(self.fail_typevar(value, slot), indent + 1)
+            return
+
+        slot = self.bindings[typevar] = 'v{0}'.format(len(self.bindings))
+        self.bind(value, typevar, slot, indent)
+
+    def bind(self, value, typevar, slot, indent=1):
+        """
+        Emit lines binding a type variable to the type of value, after
+        checking its constraint.
+        """
+        constraint = self.sig.constraint(typevar)
+        if constraint is not None:
+            name = self.const('C' + slot, constraint)
+            self.subtype(value, name, indent)
+            self.emit(self.fail_typevar(value, name), indent + 1)
+        self.emit('{0} = type({1})'.format(slot, value), indent)
+
+
+def parameters(sig):
+    return ['a{0}'.format(i) for i in range(len(sig.args))]
+
+
+def binders(sig):
+    """
+    Type variables of the arguments with the local variable and the index
+    of the argument binding them, in the order Source.unify binds them.
+    """
+    seen = []
+    for i, typeclass in enumerate(sig.args):
+        if issubclass(typeclass, TypeVariable) and typeclass not in seen:
+            seen.append(typeclass)
+            yield typeclass, 'v{0}'.format(len(seen) - 1), i
+
+
+def emit_unpack(src, params, keywords=False):
+    """
+    Emit lines unpacking args into params with a fixed arity, and rejecting
+    the keyword arguments, which the signatures can not name.
+    """
+    if keywords:
+        src.emit('if kwargs:')
+        src.emit('raise arity_error(args, sig, kwargs)', 2)
+    src.emit('try:')
+    src.emit('{0}, = args'.format(', '.join(params)), 2)
+    src.emit('except ValueError:')
+    src.emit('raise arity_error(args, sig)', 2)
+
+
+def emit_guards(src, params, trusted=()):
+    for i, (param, typeclass) in enumerate(zip(params, src.sig.args)):
+        src.guard(param, typeclass, 'T{0}'.format(i), trusted=i in trusted, trustable=True)
+
+
+def emit_arguments(src, params):
+    """
+    Emit lines unpacking args into params with a fixed arity and checking
+    their types.
+    """
+    emit_unpack(src, params)
+    emit_guards(src, params)
+
+
+def cacheable(sig, trusted=()):
+    """
+    Does the signature have argument checks worth skipping with an inline
+    cache, that is something else than plain classes or trusted arguments.
+    """
+    if any(isinstance(typeclass, Container) for typeclass in sig.args):
+        return False
+    return any(
+        isinstance(typeclass, ABCMeta) or issubclass(typeclass, TypeVariable)
+        for i, typeclass in enumerate(sig.args) if i not in trusted
+    )
+
+
+def emit_return(src, params, indent=1):
+    """
+    Emit lines calling the function and checking its return value.
+    """
+    # Each branch of the inline cache returns on its own, so the state of
+    # the checks is restored for the branches after it
+    saved = dict(src.bindings), set(src.optional), set(src.seeded), list(src.shared), list(src.pending)
+    src.call_hooks('after_check', 'args', indent)
+    if src.timed:
+        src.emit('s1 = clock()', indent)
+    src.emit('result = {0}fun({1})'.format('await ' if src.awaits else '', ', '.join(params)), indent)
+    if src.timed:
+        src.emit('s2 = clock()', indent)
+    src.unshare(indent)
+    src.guard('result', src.sig.returns, 'R', indent)
+    src.wrap(indent)
+    if src.trusting and guaranteed(src.sig) is not None:
+        src.emit('trust.last = (result, {0})'.format(src.const('G', guaranteed(src.sig))), indent)
+    if src.timed:
+        src.emit('s3 = clock()', indent)
+        src.emit('counters[{0}] += s1 - s0'.format(ARGS), indent)
+        src.emit('counters[{0}] += s2 - s1'.format(FUN), indent)
+        src.emit('counters[{0}] += s3 - s2'.format(RETURNS), indent)
+        src.emit('histogram[(s1 - s0 + s3 - s2).bit_length()] += 1', indent)
+    src.call_hooks('after_call', 'args, result', indent)
+    src.emit('return result', indent)
+    src.bindings, src.optional, src.seeded, src.shared, src.pending = saved
+
+
+def emit_statistics(src, statistics):
+    """
+    Emit lines starting the timing of a call, and count the errors raised
+    by the checks.
+    """
+    src.timed = True
+    src.const('clock', clock)
+    src.const('counters', statistics.counters)
+    src.const('histogram', statistics.histogram)
+    for name in ERRORS:
+        src.const(name, statistics.counting(src.namespace[name]))
+    src.emit('counters[{0}] += 1'.format(CALLS))
+    src.emit('s0 = clock()')
+
+
+def emit_hooks(src, arr):
+    """
+    Emit lines calling the before_check hooks, and call the on_error hooks
+    with the errors raised by the checks.
+    """
+    src.const('arr', arr)
+    src.hooks = dict((event, hooks(arr, event)) for event in ('before_check', 'after_check', 'after_call'))
+    on_error = hooks(arr, 'on_error')
+    if on_error:
+        for name in ERRORS:
+            src.const(name, failing(src.namespace[name], arr, on_error))
+    src.call_hooks('before_check', 'args')
+
+
+def emit_trust(src):
+    """
+    Emit lines reading the last value returned by a trusting arrow, when
+    there are arguments that could be trusted.
+    """
+    if any(isinstance(typeclass, ABCMeta) and not issubclass(typeclass, TypeVariable)
+           for typeclass in src.sig.args):
+        src.emit('last, proof = trust.last')
+
+
+def emit_inline_cache(src, arr, params):
+    """
+    Emit lines testing the argument types against the inline cache entries.
+    """
+    types = ['t{0}'.format(i) for i in range(len(params))]
+    for param, local in zip(params, types):
+        src.emit('{0} = type({1})'.format(local, param))
+
+    for n, entry in enumerate(arr._inline_cache):
+        tests = [
+            '{0} is {1}'.format(local, src.const('K{0}_{1}'.format(n, i), cls))
+            for i, (local, cls) in enumerate(zip(types, entry))
+        ]
+        src.emit('if {0}:'.format(' and '.join(tests)))
+        for typevar, slot, i in binders(src.sig):
+            src.bindings[typevar] = slot
+            src.emit('{0} = {1}'.format(slot, types[i]), 2)
+        emit_return(src, params, 2)
+        src.bindings = {}
+    return types
+
+
+def source(arr, trusted=()):
+    """
+    Source of the checked call path for an arrow.
+
+    The arguments at the trusted indices are not checked, see
+    signature.guarantees.
+    """
+    sig = arr.signature
+    src = Source(sig)
+    src.const('fun', arr._target())
+    params = parameters(sig)
+
+    # The checked call path of a coroutine function is a coroutine function
+    # checking the awaited result
+    src.awaits = arr._awaits
+    src.emit('{0}def checked(*args, **kwargs):'.format('async ' if src.awaits else ''), 0)
+    emit_hooks(src, arr)
+    if arr._statistics is not None:
+        emit_statistics(src, arr._statistics)
+    if arr._trusting:
+        src.trusting = True
+        src.const('trust', record)
+    emit_unpack(src, params, keywords=True)
+    if not cacheable(sig, trusted):
+        if src.trusting:
+            emit_trust(src)
+        emit_guards(src, params, trusted)
+    else:
+        types = emit_inline_cache(src, arr, params)
+        if src.trusting:
+            emit_trust(src)
+        emit_guards(src, params, trusted)
+        if not arr._megamorphic:
+            src.const('record', arr._record)
+            src.emit('record(({0},))'.format(', '.join(types)))
+    src.wrap()
+    emit_return(src, params)
+
+    return src
+
+
+def validator_source(sig, returns=False):
+    """
+    Source of a function validating the arguments of a call, and
+    optionally its result, without calling anything.
+    """
+    src = Source(sig)
+    params = parameters(sig)
+
+    src.emit('def validate(args{0}):'.format(', result' if returns else ''), 0)
+    emit_arguments(src, params)
+    if returns:
+        src.guard('result', sig.returns, 'R')
+
+    return src
+
+
+def filename(fun):
+    """
+    File name of the call paths generated for a typed function.
+    """
+    return '<sagitta {0}>'.format(qualified_name(fun))
+
+
+def disguise(function, fun):
+    """
+    Name a call path generated for a typed function after the function,
+    so that profilers and tracebacks show each arrow as a frame of its own.
+    """
+    name = getattr(fun, '__name__', None) or classname(fun)
+    qualname = getattr(fun, '__qualname__', name)
+    code = function.__code__
+    try:
+        try:
+            code = code.replace(co_name=name, co_qualname=qualname, co_filename=filename(fun))
+        except TypeError:  # Python < 3.11 has no co_qualname
+            code = code.replace(co_name=name, co_filename=filename(fun))
+        function.__code__ = code
+    except AttributeError:  # Python < 3.8 can not replace code attributes
+        pass
+
+    function.__name__ = name
+    function.__qualname__ = qualname
+    function.__module__ = getattr(fun, '__module__', None)
+    function.__doc__ = getattr(fun, '__doc__', None)
+    function.__wrapped__ = fun
+    return function
+
+
+def compile_source(src, name, path='<sagitta.compiler>'):
+    """
+    Execute the source and return the function it defines.
+    """
+    code = compile(str(src), path, 'exec')
+    exec(code, src.namespace)
+    return src.namespace[name]
+
+
+def compile_arrow(arr, trusted=()):
+    """
+    Generate the checked call path for an arrow.
+    """
+    return disguise(compile_source(source(arr, trusted), 'checked', filename(arr._fun)), arr._fun)
+
+
+def compile_validators(sig):
+    """
+    Generate the validators for the arguments of a call, and for the
+    arguments together with the result of a call.
+    """
+    return (
+        compile_source(validator_source(sig), 'validate'),
+        compile_source(validator_source(sig, returns=True), 'validate'),
+    )
@@ -0,0 +1,40 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Global configuration of Sagitta
+
+Checking can be turned off for the whole process by setting the environment
+variable SAGITTA_CHECKING to 0, off, false or no, or by calling
+set_checking(False) before importing the modules using typed.
+"""
+
+import os
+
+OFF = ('0', 'off', 'false', 'no')
+
+CHECKING = os.environ.get('SAGITTA_CHECKING', 'on').strip().lower() not in OFF
+
+
+def checking():
+    """
+    Are the functions decorated with typed checked.
+    """
+    return CHECKING
+
+
+def set_checking(enabled):
+    """
+    Turn checking of the functions decorated with typed from now on
+    on or off.
+
+    When off, typed still validates the signature, but returns the function
+    itself with the signature as its signature attribute.
+    """
+    global CHECKING  # pylint: disable=W0603
+    CHECKING = bool(enabled)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Parametric container types
+
+Signatures can use container type expressions like in Haskell:
+
+    [A]             list of elements of type A
+    (A, B)          tuple of two values of types A and B
+    {K: V}          dict with keys of type K and values of type V
+    Iterator[A]     iterator of elements of type A, checked lazily
+
+The expressions can be nested, for example [(str, Int)]. Each expression
+is parsed into a class with the Container metaclass, which is the same
+class for the same expression, so that signatures compare equal.
+
+The elements are checked by the compiled call paths, see sagitta.compiler.
+
+An Iterator argument or return value is not consumed by the check.
+Instead it is wrapped in a lazy iterator, which checks each element as it
+is pulled, so that streams of any length are checked in constant memory.
+The value must be an iterator, like a generator, and not a list, which
+the function could iterate more than once.
+The type variables bound by the elements are shared by the lazy iterators
+of a call. Iterators can not be nested in other containers, as their
+elements can not be replaced.
+"""
+
+try:
+    import copyreg
+except ImportError:  # Python 2
+    import copy_reg as copyreg
+
+try:
+    from collections import abc
+except ImportError:  # Python 2
+    import collections as abc
+
+from sagitta.inspect import classname
+from sagitta.typevar import TypeVariable
+
+
+class Container(type):
+    """
+    Metaclass of the container types, which have the class of the
+    container as origin and the types of the elements as items.
+    """
+
+
+_containers = {}
+
+
+def container(origin, items):
+    """
+    The container type of the origin class with the item types.
+    """
+    key = (origin, tuple(items))
+    if key not in _containers:
+        _containers[key] = Container(name(origin, items), (object,), {
+            'origin': origin,
+            'items': tuple(items),
+        })
+    return _containers[key]
+
+
+def name(origin, items):
+    names = [classname(item) for item in items]
+    if origin is abc.Iterator:
+        return 'Iterator[{0}]'.format(names[0])
+    if origin is list:
+        return '[{0}]'.format(names[0])
+    if origin is dict:
+        return '{{{0}: {1}}}'.format(*names)
+    return '({0}{1})'.format(', '.join(names), ',' if len(names) == 1 else '')
+
+
+def parse(expression):
+    """
+    Container type of a type expression, or the expression itself when it
+    is a class.
+    """
+    if isinstance(expression, list):
+        if len(expression) != 1:
+            raise TypeError("Expected one element type in {0}.".format(expression))
+        return container(list, nested([parse(expression[0])]))
+    if isinstance(expression, tuple):
+        return container(tuple, nested([parse(item) for item in expression]))
+    if isinstance(expression, dict):
+        if len(expression) != 1:
+            raise TypeError("Expected one key and value type in {0}.".format(expression))
+        key, value = list(expression.items())[0]
+        return container(dict, nested([parse(key), parse(value)]))
+    return expression
+
+
+def nested(items):
+    """
+    Validate the item types of a container.
+    """
+    for item in items:
+        if islazy(item) or any(islazy(inner) for inner in containers(item)):
+            raise TypeError("Iterator types can not be nested in containers.")
+    return items
+
+
+def islazy(typeclass):
+    return isinstance(typeclass, Container) and typeclass.origin is abc.Iterator
+
+
+class Subscript(type):
+    """
+    Metaclass of the Iterator type constructor.
+    """
+    def __getitem__(cls, item):
+        return container(abc.Iterator, nested([parse(item)]))
+
+
+Iterator = Subscript('Iterator', (object,), {})
+
+
+def containers(typeclass):
+    """
+    The containers nested in a container type.
+    """
+    if not isinstance(typeclass, Container):
+        return []
+    return [item for item in typeclass.items if isinstance(item, Container)] + [
+        inner for item in typeclass.items for inner in containers(item)
+    ]
+
+
+class lazy(object):
+    """
+    Iterator checking each element of an iterable as it is pulled.
+
+    An element of the same type as the previous one is not checked again,
+    unless the elements are containers.
+    """
+    __slots__ = ('iterator', 'item', 'check', 'bindings', 'last')
+
+    def __init__(self, iterable, item, check, bindings):
+        self.iterator = iter(iterable)
+        self.item = item
+        self.check = check
+        self.bindings = bindings
+        self.last = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = next(self.iterator)
+        if type(value) is not self.last:
+            self.check(value, self.item, self.bindings)
+            if not isinstance(self.item, Container):
+                self.last = type(value)
+        return value
+
+    next = __next__  # Python 2
+
+    def __repr__(self):
+        return 'lazy({0!r}, {1})'.format(self.iterator, classname(self.item))
+
+
+def expression(typeclass):
+    """
+    Type expression of a container type, the inverse of parse.
+    """
+    if not isinstance(typeclass, Container):
+        return typeclass
+    items = [expression(item) for item in typeclass.items]
+    if typeclass.origin is abc.Iterator:
+        return Iterator[items[0]]
+    if typeclass.origin is list:
+        return items
+    if typeclass.origin is dict:
+        return {items[0]: items[1]}
+    return tuple(items)
+
+
+def typevars(typeclass):
+    """
+    Type variables of a type, in the order of their first occurrence.
+    """
+    if isinstance(typeclass, Container):
+        found = []
+        for item in typeclass.items:
+            found += [typevar for typevar in typevars(item) if typevar not in found]
+        return found
+    if issubclass(typeclass, TypeVariable):
+        return [typeclass]
+    return []
+
+
+def reduce(typeclass):
+    if islazy(typeclass):
+        return (iterator, (expression(typeclass.items[0]),))
+    return (parse, (expression(typeclass),))
+
+
+def iterator(item):
+    return Iterator[item]
+
+
+copyreg.pickle(Container, reduce)
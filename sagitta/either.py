@@ -0,0 +1,48 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Tagged values routed by the choice combinators, see sagitta.graph
+
+Like Either in Haskell, a value is tagged either Left or Right:
+
+    Left(1)
+    Right('error')
+"""
+
+
+class Either(object):
+    """
+    Value tagged Left or Right.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        if isinstance(other, Either):
+            return type(self) is type(other) and self.value == other.value
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self.value))
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, self.value)
+
+
+class Left(Either):
+    __slots__ = ()
+
+
+class Right(Either):
+    __slots__ = ()
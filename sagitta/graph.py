@@ -0,0 +1,372 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Dataflow graphs of arrows
+
+The Haskell arrow combinators build graphs of arrows working on tuples:
+
+    first f     (b, d) -> (c, d)
+    second f    (d, b) -> (d, c)
+    f * g       (b, b') -> (c, c')     split, *** in Haskell
+    f & g       b -> (c, c')           fanout, &&& in Haskell
+
+and the choice combinators on values tagged Left or Right, see
+sagitta.either:
+
+    left f      Either b d -> Either c d
+    right f     Either d b -> Either d c
+    f + g       Either b b' -> Either c c'     choice, +++ in Haskell
+    f | g       Either b b' -> d               fanin, ||| in Haskell
+
+The operators keep the Python precedence and associativity, not the
+Haskell fixities of infixr 3 *** and &&&, and infixr 1 >>>:
+
+    f * g * h       (f * g) * h, taking ((b, b'), b'')
+    f & g >> h      f & (g >> h), as >> binds tighter than &
+    f + g | h       (f + g) | h, as + binds tighter than |
+
+Use parentheses to nest the other way.
+
+The branches check their own arguments and return values, so the nodes
+check only that they get and return tuples of the right length, or values
+with a tag. The choice nodes route a value to its branch by looking up its
+tag from a table, so only the branch taken is checked.
+
+The branches of a node are independent of each other, so they can be run
+concurrently on a concurrent.futures executor given as the pool, for
+example a ThreadPoolExecutor for I/O bound branches or a ProcessPoolExecutor
+for CPU bound ones. A process pool needs the typed functions to be
+picklable, see arrow.__reduce__.
+
+When the same arrow appears in several places of a graph, like f in
+
+    (f >> g) & (f >> h)
+
+a shared copy of the graph calls it only once for each argument during
+a call, and passes the result to all its consumers. The arrows must be
+pure functions for this. The results are kept for each call separately,
+in the thread making it, so the branches run on a pool are not shared.
+"""
+
+import threading
+
+from sagitta.arrow import arrow
+from sagitta.either import Either, Left, Right
+from sagitta.exceptions import StrictTypeError
+from sagitta.inspect import classname
+from sagitta.typevar import A
+
+
+def identity(x):
+    return x
+
+
+def branching(branches):
+    """
+    Validate that the branches are arrows taking one argument.
+    """
+    branches = list(branches)
+    for branch in branches:
+        assert isinstance(branch, arrow)
+        if len(branch.signature.args) != 1:
+            raise StrictTypeError(
+                "Can not combine {0}, it takes {1} arguments instead of one."
+                "".format(branch, len(branch.signature.args))
+            )
+    if len(branches) < 2:
+        raise TypeError("Needs at least two branches to combine.")
+    return branches
+
+
+def sequential(branches):
+    def run(values):
+        return tuple([branch(value) for branch, value in zip(branches, values)])
+    return run
+
+
+def concurrent(branches, pool):
+    def run(values):
+        futures = [pool.submit(branch, value) for branch, value in zip(branches, values)]
+        return tuple([future.result() for future in futures])
+    return run
+
+
+class node(arrow):
+    """
+    Node of a dataflow graph calling its branches with the values of a tuple,
+    sequentially or on the pool.
+    """
+    operator = ', '
+
+    def __init__(self, branches, pool=None):
+        self.branches = branching(branches)
+        self.pool = pool
+        arrow.__init__(self, self._runner(), *self._types())
+
+    def _runner(self):
+        if self.pool is None:
+            run = sequential(self.branches)
+        else:
+            run = concurrent(self.branches, self.pool)
+        run.__name__ = classname(self)
+        return run
+
+    def _types(self):
+        return [tuple, tuple]
+
+    def _arguments(self):
+        # The pool is not sent to other processes
+        return (self.branches,), {}
+
+    def _children(self):
+        return list(self.branches)
+
+    def _with(self, branches):
+        return type(self)(branches, self.pool)
+
+    def __repr__(self):
+        return "{0}({1})".format(
+            classname(self),
+            self.operator.join(repr(branch) for branch in self.branches)
+        )
+
+
+class split(node):
+    """
+    Call each branch with the corresponding value of a tuple.
+    """
+    operator = ' * '
+
+    def _runner(self):
+        run = node._runner(self)
+        size = len(self.branches)
+
+        def split(values):
+            if len(values) != size:
+                raise StrictTypeError(
+                    "Expected a tuple of {0} values, got '{1}'."
+                    "".format(size, values)
+                )
+            return run(values)
+
+        split.__name__ = run.__name__
+        return split
+
+
+class fanout(node):
+    """
+    Call each branch with the same value.
+    """
+    operator = ' & '
+
+    def _runner(self):
+        run = node._runner(self)
+        size = len(self.branches)
+
+        def fanout(value):
+            return run((value,) * size)
+
+        fanout.__name__ = run.__name__
+        return fanout
+
+    def _types(self):
+        sig = self.branches[0].signature
+        return [sig.resolve(sig.args[0]), tuple]
+
+
+def first(arr, pool=None):
+    return split([arr, arrow(identity, A, A)], pool)
+
+
+def second(arr, pool=None):
+    return split([arrow(identity, A, A), arr], pool)
+
+
+def routes(branches, tags):
+    """
+    Table of the branches and tags of the results by the tags of the values.
+    """
+    return dict(zip((Left, Right), zip(branches, tags)))
+
+
+def route_error(value):
+    return StrictTypeError(
+        "Expected a value tagged Left or Right, got '{0}' {1}."
+        "".format(value, type(value))
+    )
+
+
+class choice(node):
+    """
+    Call the branch for the tag of a value, and tag the result the same way.
+    """
+    operator = ' + '
+
+    def __init__(self, branches):
+        node.__init__(self, branches)  # <- only one branch is called, no pool
+
+    def _with(self, branches):
+        return type(self)(branches)
+
+    def _tags(self):
+        return (Left, Right)
+
+    def _runner(self):
+        table = routes(self.branches, self._tags())
+
+        def choice(value):
+            try:
+                branch, tag = table[type(value)]
+            except KeyError:
+                raise route_error(value)
+            return tag(branch(value.value))
+
+        choice.__name__ = classname(self)
+        return choice
+
+    def _types(self):
+        return [Either, Either]
+
+
+class fanin(choice):
+    """
+    Call the branch for the tag of a value, and return the result untagged.
+    """
+    operator = ' | '
+
+    def _tags(self):
+        return (identity, identity)
+
+    def _types(self):
+        returns = [branch.signature.resolve(branch.signature.returns) for branch in self.branches]
+        return [Either, returns[0] if returns[0] is returns[1] else object]
+
+
+def left(arr):
+    return choice([arr, arrow(identity, A, A)])
+
+
+def right(arr):
+    return choice([arrow(identity, A, A), arr])
+
+
+def occurrences(arr, counts=None):
+    """
+    Number of times each arrow appears in the graph, by identity.
+    """
+    counts = {} if counts is None else counts
+    entry = counts.setdefault(id(arr), [arr, 0])
+    entry[1] += 1
+    for child in arr._children():
+        occurrences(child, counts)
+    return counts
+
+
+def rebuild(arr, replace):
+    """
+    Copy of the graph with the arrows in replace replaced.
+    """
+    if id(arr) in replace:
+        return replace[id(arr)]
+    children = arr._children()
+    if not children:
+        return arr
+    return arr._with([rebuild(child, replace) for child in children])
+
+
+class Tables(threading.local):
+    """
+    The memo tables of the call of a shared graph running in a thread.
+    """
+    current = None
+
+
+def memoized(arr, tables, index):
+    """
+    Function calling the arrow once for each tuple of arguments, by identity,
+    during a call of a shared graph.
+
+    The table keeps the arguments alive, so their ids are not reused while
+    the call runs. Outside of a call, like on the threads of a pool, the
+    arrow is called every time.
+    """
+    def cached(*args):
+        current = tables.current
+        if current is None:
+            return arr(*args)
+        table = current[index]
+        key = tuple(map(id, args))
+        hit = table.get(key)
+        if hit is not None and all(a is b for a, b in zip(hit[0], args)):
+            return hit[1]
+        result = arr(*args)
+        table[key] = (args, result)
+        return result
+
+    cached.__name__ = getattr(arr._fun, '__name__', classname(arr))
+    return cached
+
+
+class memo(arrow):
+    """
+    Arrow calling another arrow once for each tuple of arguments during
+    a call of a shared graph.
+
+    The other arrow checks its own arguments and return values.
+    """
+    def __init__(self, arr, tables, index):
+        self.arrow = arr
+        arrow.__init__(self, memoized(arr, tables, index), *arr.signature.types, **arr.signature.keywords())
+        self.set_checking(False)
+
+    def __reduce__(self):
+        return self.arrow.__reduce__()
+
+    def __repr__(self):
+        return repr(self.arrow)
+
+
+class shared(arrow):
+    """
+    Copy of a graph calling each arrow that appears in it more than once
+    only once for each argument, during each call of the graph.
+
+    Each call has tables of its own, which are dropped when it returns.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self._tables = Tables()
+        replace = {}
+        for key, (sub, count) in occurrences(graph).items():
+            if count > 1:
+                replace[key] = memo(sub, self._tables, len(replace))
+        self._memos = len(replace)
+        self.rebuilt = rebuild(graph, replace)
+        arrow.__init__(self, self._runner(), *graph.signature.types, **graph.signature.keywords())
+        self.set_checking(False)  # <- the graph checks itself
+
+    def _runner(self):
+        call, tables, memos = self.rebuilt, self._tables, self._memos
+
+        def run(*args):
+            previous = tables.current  # <- of an outer call in this thread
+            tables.current = [{} for _ in range(memos)]
+            try:
+                return call(*args)
+            finally:
+                tables.current = previous
+
+        run.__name__ = classname(self)
+        return run
+
+    def _arguments(self):
+        return (self.graph,), {}
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(classname(self), self.graph)
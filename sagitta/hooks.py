@@ -0,0 +1,104 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Hooks for tracing the calls of arrows
+
+Hooks are called on these events of a checked call:
+
+    before_check(arr, args)         before checking the arguments
+    after_check(arr, args)          after checking the arguments
+    after_call(arr, args, result)   after checking the return value
+    on_error(arr, error)            before a check raises a StrictTypeError
+
+Hooks can be registered for all arrows with register, or for one arrow
+with arrow.add_hook. The hooks are compiled into the call paths of the
+arrows, so events without hooks cost nothing.
+"""
+
+import threading
+import weakref
+
+
+EVENTS = ('before_check', 'after_check', 'after_call', 'on_error')
+
+_hooks = dict((event, []) for event in EVENTS)
+_arrows = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+def validate(event):
+    if event not in EVENTS:
+        raise ValueError("Unknown event '{0}', expected one of {1}.".format(event, ', '.join(EVENTS)))
+
+
+def track(arr):
+    with _lock:
+        _arrows.add(arr)
+
+
+def arrows():
+    """
+    The arrows alive, typed or built directly.
+    """
+    with _lock:
+        return list(_arrows)
+
+
+def hooks(arr, event):
+    """
+    Global hooks and the hooks of the arrow for an event.
+    """
+    return list(_hooks[event]) + list(arr._hooks.get(event, ()))
+
+
+def recompile():
+    for arr in arrows():
+        arr._compile()
+
+
+def register(event, hook):
+    """
+    Register a hook for an event of all arrows.
+    """
+    validate(event)
+    with _lock:
+        _hooks[event] = _hooks[event] + [hook]
+    recompile()
+
+
+def unregister(event, hook):
+    """
+    Remove a hook registered for all arrows.
+    """
+    validate(event)
+    with _lock:
+        _hooks[event] = [registered for registered in _hooks[event] if registered is not hook]
+    recompile()
+
+
+def clear():
+    """
+    Remove all hooks registered for all arrows.
+    """
+    with _lock:
+        for event in EVENTS:
+            _hooks[event] = []
+    recompile()
+
+
+def failing(error, arr, on_error):
+    """
+    Wrap an error constructor to call the on_error hooks with the errors.
+    """
+    def failed(*args):
+        err = error(*args)
+        for hook in on_error:
+            hook(arr, err)
+        return err
+    return failed
@@ -10,7 +10,7 @@
 Inspection of types, functions and objects
 """
 
-import abc
+import inspect
 
 
 def classname(obj):
@@ -24,7 +24,14 @@ def classname(obj):
 
 
 def istype(obj):
-    return type(obj) in (type, abc.ABCMeta)
+    return isinstance(obj, type)
+
+
+def iscoroutinefunction(obj):
+    """
+    Is the object an async def function, returning a coroutine when called.
+    """
+    return getattr(inspect, 'iscoroutinefunction', lambda obj: False)(obj)
 
 
 def issequence(arg):
@@ -74,3 +81,12 @@ def props(obj, public=True, private=False, magic=False, globs=False, exclude=Non
             globs=globs, exclude=exclude or []
         )
     ])
+
+
+def qualified_name(obj):
+    """
+    Module and qualified name of a function or class as string
+    """
+    name = getattr(obj, '__qualname__', None) or getattr(obj, '__name__', None) or classname(obj)
+    module = getattr(obj, '__module__', None)
+    return '{0}.{1}'.format(module, name) if module else name
@@ -0,0 +1,116 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Attribution of the time spent in arrows under cProfile
+
+The call paths of the arrows are named after their typed functions and
+have file names of their own (see sagitta.compiler.filename), so the
+profile shows them as separate frames. The frames are told apart by the
+code of the call paths each arrow has compiled, so the arrows over the
+same function get separate rows. profile runs a callable under
+cProfile and attributes the time spent in each arrow to checking and to
+the typed function.
+"""
+
+from __future__ import print_function
+
+import cProfile
+import os
+import sys
+
+from sagitta import hooks
+from sagitta.inspect import qualified_name
+
+# Builtins called by the generated call paths
+CHECKING_BUILTINS = ('isinstance', 'issubclass', 'type', 'perf_counter_ns')
+SAGITTA = os.path.dirname(os.path.abspath(__file__))
+
+
+def is_checking(code):
+    """
+    Is the code of a profile entry part of checking.
+    """
+    if not hasattr(code, 'co_filename'):  # builtin
+        return any(builtin in code for builtin in CHECKING_BUILTINS)
+    path = code.co_filename
+    return path.startswith('<sagitta') or os.path.abspath(path).startswith(SAGITTA)
+
+
+def is_function(code, fun):
+    """
+    Is the code of a profile entry the typed function.
+    """
+    if hasattr(fun, '__code__'):
+        return code is fun.__code__
+    return not is_checking(code)
+
+
+def attribution(entries, arrows=None):
+    """
+    Time of each arrow in the profiler entries, split into checking and
+    the typed function, as plain dictionaries.
+
+    The entries are read from cProfile.Profile.getstats, instead of pstats,
+    because recompiling a call path (see sagitta.compiler) makes code
+    objects with the same labels.
+    """
+    arrows = hooks.arrows() if arrows is None else arrows
+    # Each compiled call path has code of its own, also when the arrows
+    # share a function. Code objects of the same source compare equal,
+    # so they are told apart by identity.
+    codes = [(code, arr) for arr in arrows for code in list(arr._paths.values())]
+    paths = dict((id(code), arr) for code, arr in codes)
+    rows = {}
+
+    def group(code):
+        return paths.get(id(code)) if hasattr(code, 'co_filename') else None
+
+    for entry in entries:
+        arr = group(entry.code)
+        if arr is None:
+            continue
+        fun = arr._fun
+        row = rows.setdefault(id(arr), {
+            'arrow': qualified_name(fun),
+            'calls': 0,
+            'total': 0.0,
+            'function': 0.0,
+        })
+        inner = [sub for sub in entry.calls or () if group(sub.code) is arr]
+        row['calls'] += entry.callcount - sum(sub.callcount for sub in inner)
+        row['total'] += entry.totaltime - sum(sub.totaltime for sub in inner)
+        row['function'] += sum(
+            sub.totaltime for sub in entry.calls or ()
+            if is_function(sub.code, fun)
+        )
+
+    for row in rows.values():
+        row['checking'] = row['total'] - row['function']
+    return sorted(rows.values(), key=lambda row: row['checking'], reverse=True)
+
+
+def profile(fun, *args, **kwargs):
+    """
+    Call fun with the arguments under cProfile.
+
+    Returns the result of the call and the attribution of the time spent
+    in each arrow.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fun, *args, **kwargs)
+    return result, attribution(profiler.getstats())
+
+
+def report(rows, out=None):
+    out = out or sys.stdout
+    print('{0:<48} {1:>10} {2:>12} {3:>12} {4:>12}'.format(
+        'arrow', 'calls', 'total', 'checking', 'function'), file=out)
+    for row in rows:
+        print('{arrow:<48} {calls:>10} {total:>12.6f} {checking:>12.6f} {function:>12.6f}'.format(
+            **row), file=out)
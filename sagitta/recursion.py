@@ -0,0 +1,143 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Call paths of recursive arrows
+
+A recursive arrow is checked only at its outermost entry in each thread.
+The recursive calls made while it is active go directly to the typed
+function, so they skip the checks and the frame of the checked call path.
+
+In the outermost mode the checked call path calls a copy of a module
+level function, whose own name refers to the copy instead of the arrow.
+So the recursive calls are plain Python calls, and reach about the depth
+of the undecorated function. The other names are looked up from the
+module on each use, a little slower than usual. Functions that can not be
+copied so, like nested functions and functions writing module globals,
+call the arrow, which calls the function directly while it is active.
+Up to Python 3.11 each such call counts twice against the recursion
+limit, once for calling the arrow and once for the function.
+
+In the trampoline mode the typed function must call itself only in tail
+position. The recursive calls then return a TailCall instead of calling,
+and the outermost entry calls the function again in a loop, so that
+the recursion runs in constant stack space.
+"""
+
+import dis
+import threading
+import types
+
+try:
+    import builtins
+except ImportError:  # Python 2
+    import __builtin__ as builtins
+
+
+OUTERMOST = 'outermost'
+TRAMPOLINE = 'trampoline'
+MODES = (OUTERMOST, TRAMPOLINE)
+
+
+class Active(threading.local):
+    """
+    Is a recursive arrow active in a thread.
+    """
+    entered = False
+
+
+class TailCall(tuple):
+    """
+    Arguments of a recursive call in tail position.
+    """
+
+
+def tail_call(*args):
+    return TailCall(args)
+
+
+def validate(mode):
+    if mode not in MODES:
+        raise ValueError("Unknown recursion mode '{0}', expected one of {1}.".format(mode, ', '.join(MODES)))
+
+
+WRITES = ('STORE_GLOBAL', 'DELETE_GLOBAL')
+
+
+class Scope(dict):
+    """
+    Globals of a copied function: its own name, and the names of the
+    module and builtins looked up when used.
+    """
+    __slots__ = ('module',)
+
+    def __init__(self, module):
+        dict.__init__(self)
+        self.module = module
+
+    def __missing__(self, key):
+        value = self.module.get(key, self)
+        if value is self:
+            return vars(builtins)[key]
+        return value
+
+
+def writes_globals(code):
+    """
+    Does the code, or the code of the functions nested in it, change the
+    globals or read them with globals().
+    """
+    if 'globals' in code.co_names:
+        return True
+    if any(instruction.opname in WRITES for instruction in dis.get_instructions(code)):
+        return True
+    return any(writes_globals(const) for const in code.co_consts if isinstance(const, types.CodeType))
+
+
+def rebound(fun):
+    """
+    Copy of a module level function, whose own name refers to the copy,
+    or the function itself when it can not be copied so.
+    """
+    code = getattr(fun, '__code__', None)
+    if (code is None or getattr(fun, '__qualname__', None) != fun.__name__ or
+            fun.__name__ not in code.co_names or writes_globals(code)):
+        return fun
+    scope = Scope(fun.__globals__)
+    copy = types.FunctionType(code, scope, fun.__name__, fun.__defaults__, fun.__closure__)
+    copy.__kwdefaults__ = fun.__kwdefaults__
+    copy.__module__ = fun.__module__
+    scope[fun.__name__] = copy
+    return copy
+
+
+def outermost(call, active):
+    """
+    Call path marking the arrow active for the duration of the call.
+    """
+    def entry(*args, **kwargs):
+        active.entered = True
+        try:
+            return call(*args, **kwargs)
+        finally:
+            active.entered = False
+
+    return entry
+
+
+def trampoline(fun):
+    """
+    Function calling fun again with the arguments of each TailCall it returns.
+    """
+    def bounce(*args):
+        result = fun(*args)
+        while type(result) is TailCall:
+            result = fun(*result)
+        return result
+
+    return bounce
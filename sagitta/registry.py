@@ -0,0 +1,108 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Registry of the arrows built by typed, grouped by module
+
+Checking can be turned on and off for a module (and its submodules) or
+for all modules while the process is running. The arrows are switched in
+place between their checked and unchecked call paths, so that the unchecked
+arrows call the typed function directly without looking up any flags.
+
+The state of a module also applies to the arrows built for it later,
+so disable() before importing the typed modules starts them unchecked.
+"""
+
+import threading
+import weakref
+
+
+_arrows = {}  # module name -> arrows
+_states = {}  # module name, or None for all modules -> checking
+_lock = threading.RLock()
+
+
+def module_name(module):
+    return getattr(module, '__name__', module)
+
+
+def matches(name, module):
+    """
+    Is the module name the module or one of its submodules.
+    """
+    return module is None or name == module or name.startswith(module + '.')
+
+
+def checking(module):
+    """
+    Is checking on for the module.
+    """
+    name = module_name(module)
+    with _lock:
+        parts = name.split('.')
+        for i in range(len(parts), 0, -1):
+            prefix = '.'.join(parts[:i])
+            if prefix in _states:
+                return _states[prefix]
+        return _states.get(None, True)
+
+
+def register(arr):
+    """
+    Register an arrow under the module of its function, and set its
+    checking according to the module.
+    """
+    name = getattr(arr._fun, '__module__', None) or ''
+    with _lock:
+        _arrows.setdefault(name, weakref.WeakSet()).add(arr)
+        if checking(name) != arr.checking:
+            arr.set_checking(checking(name))  # <- recompiles, only when needed
+    return arr
+
+
+def arrows(module=None):
+    """
+    The registered arrows of the module and its submodules,
+    or of all modules.
+    """
+    module = module_name(module)
+    with _lock:
+        return [
+            arr
+            for name, group in list(_arrows.items()) if matches(name, module)
+            for arr in list(group)
+        ]
+
+
+def set_checking(enabled, module=None):
+    """
+    Turn checking on or off for the module and its submodules, or for all
+    modules, replacing the states set for any of them earlier.
+    """
+    module = module_name(module)
+    with _lock:
+        for name in list(_states):
+            if name is not None and matches(name, module):
+                del _states[name]
+        _states[module] = bool(enabled)
+        for arr in arrows(module):
+            arr.set_checking(enabled)
+
+
+def enable(module=None):
+    """
+    Turn checking on for the module and its submodules, or for all modules.
+    """
+    set_checking(True, module)
+
+
+def disable(module=None):
+    """
+    Turn checking off for the module and its submodules, or for all modules.
+    """
+    set_checking(False, module)
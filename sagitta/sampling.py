@@ -0,0 +1,87 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Sampled checking of arrows
+
+A sampled arrow checks only some of its calls and calls the typed function
+directly for the rest. Each call counts down the calls left until the next
+checked call, so that a skipped call costs one decrement and one comparison.
+With a random sampling rate the distance to the next checked call is drawn
+only when a call is checked, not on every call.
+"""
+
+import math
+import random
+
+
+class Sampler(object):
+    """
+    Decides which calls of an arrow are checked.
+
+    Rate is either an integer N for checking every Nth call, or a float
+    between 0 and 1 for checking that fraction of the calls at random.
+    """
+    def __init__(self, rate):
+        if isinstance(rate, float):
+            if not 0.0 < rate <= 1.0:
+                raise ValueError("Sampling rate should be between 0 and 1, got {0}.".format(rate))
+        elif int(rate) != rate or rate < 1:
+            raise ValueError("Sampling interval should be a positive integer, got {0}.".format(rate))
+
+        self.rate = rate
+        self.left = [self.gap()]
+        self.scheduled = self.left[0]
+        self.sampled = 0
+
+    def gap(self):
+        """
+        Number of calls until the next checked call.
+        """
+        if not isinstance(self.rate, float):
+            return self.rate
+        if self.rate == 1.0:
+            return 1
+        # Geometric distribution of the gaps between Bernoulli trials
+        return int(math.log(1.0 - random.random()) / math.log(1.0 - self.rate)) + 1
+
+    def sample(self):
+        gap = self.gap()
+        self.sampled += 1
+        self.scheduled += gap
+        self.left[0] = gap
+
+    @property
+    def calls(self):
+        return self.scheduled - self.left[0]
+
+    def statistics(self):
+        calls = self.calls
+        return {
+            'rate': self.rate,
+            'calls': calls,
+            'sampled': self.sampled,
+            'skipped': calls - self.sampled,
+        }
+
+    def wrap(self, fun, checked):
+        """
+        Call path that calls checked on the sampled calls and fun directly
+        on the others.
+        """
+        left = self.left
+        sample = self.sample
+
+        def sampled(*args, **kwargs):
+            left[0] -= 1
+            if left[0] > 0:
+                return fun(*args, **kwargs)
+            sample()
+            return checked(*args, **kwargs)
+
+        return sampled
@@ -0,0 +1,143 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Runtime statistics of arrows
+
+An arrow with statistics enabled counts its calls, the time spent checking
+the arguments, calling the typed function and checking the return value,
+and the StrictTypeErrors its checks raise. The overhead of checking each
+call goes to a histogram with power of two buckets of nanoseconds.
+
+The counters are plain list items updated inline by the compiled call
+path, without locks, so concurrent calls may occasionally lose an update.
+
+snapshot() returns the statistics of all arrows as plain dictionaries.
+"""
+
+import threading
+import time
+import weakref
+
+from sagitta import registry
+from sagitta.inspect import qualified_name
+
+try:
+    from time import perf_counter_ns as clock
+except ImportError:  # Python < 3.7
+    def clock():
+        return int(time.time() * 1e9)
+
+
+CALLS, ARGS, FUN, RETURNS, ERRORS = range(5)
+BUCKETS = 65  # Bucket n counts the overheads from 2 ** (n - 1) to 2 ** n ns
+
+_arrows = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+class Statistics(object):
+    """
+    Counters and latency histogram of an arrow.
+    """
+    def __init__(self):
+        self.counters = [0] * 5
+        self.histogram = [0] * BUCKETS
+
+    def counting(self, error):
+        """
+        Wrap an error constructor to count the errors.
+        """
+        counters = self.counters
+
+        def counted(*args):
+            counters[ERRORS] += 1
+            return error(*args)
+
+        return counted
+
+    def percentile(self, percent):
+        """
+        Upper bound in seconds of the histogram bucket with the percentile
+        of the checking overhead, or None before any calls.
+        """
+        total = sum(self.histogram)
+        if not total:
+            return None
+        rank = total * percent / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                return 2 ** bucket / 1e9
+        return None
+
+    def snapshot(self):
+        """
+        Statistics as a plain dictionary, times in seconds.
+        """
+        counters = list(self.counters)
+        return {
+            'calls': counters[CALLS],
+            'args_time': counters[ARGS] / 1e9,
+            'fun_time': counters[FUN] / 1e9,
+            'returns_time': counters[RETURNS] / 1e9,
+            'errors': counters[ERRORS],
+            'overhead_p50': self.percentile(50),
+            'overhead_p99': self.percentile(99),
+            'histogram': dict(
+                (2 ** bucket / 1e9, count)
+                for bucket, count in enumerate(self.histogram) if count
+            ),
+        }
+
+
+def track(arr):
+    with _lock:
+        _arrows.add(arr)
+
+
+def untrack(arr):
+    with _lock:
+        _arrows.discard(arr)
+
+
+def snapshot():
+    """
+    Statistics of all arrows with statistics enabled, by the qualified
+    names of their functions.
+    """
+    with _lock:
+        arrows = list(_arrows)
+    stats = {}
+    for arr in arrows:
+        name = qualified_name(arr._fun)
+        key, n = name, 1
+        while key in stats:
+            n += 1
+            key = '{0}#{1}'.format(name, n)
+        stats[key] = arr.statistics()
+    return stats
+
+
+def enable(module=None):
+    """
+    Enable statistics for the arrows of the module and its submodules
+    built by typed, or for all of them.
+    """
+    for arr in registry.arrows(module):
+        arr.set_statistics(True)
+
+
+def disable(module=None):
+    """
+    Disable statistics for the arrows of the module and its submodules
+    built by typed, or for all of them.
+    """
+    for arr in registry.arrows(module):
+        arr.set_statistics(False)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Strategies for checking the elements of containers
+
+Checking every element of a large list on every call can cost more than
+the call itself. A signature can choose how many of the elements of its
+lists and dicts are checked with the elements option:
+
+    @typed([Int], Int, elements=first(100))
+
+    full()                          every element (the default)
+    first(k)                        the first k elements
+    sample(k)                       k randomly chosen elements
+    budget(elements=n, seconds=s)   elements until either budget runs out
+
+The strategy is shown in the representation of the signature, and so in
+the error messages, to tell how strong the guarantee of a check was.
+Tuples are always checked fully.
+"""
+
+import random
+
+from itertools import islice
+
+from sagitta.stats import clock
+
+
+class strategy(object):
+    """
+    Strategy for checking the elements of containers.
+    """
+    limit = None  # <- number of elements
+    seconds = None
+    random = False
+
+    def __eq__(self, other):
+        if isinstance(other, strategy):
+            return type(self) is type(other) and self.__dict__ == other.__dict__
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), tuple(sorted(self.__dict__.items()))))
+
+
+class full(strategy):
+    """
+    Check every element.
+    """
+    def __repr__(self):
+        return 'full()'
+
+
+class first(strategy):
+    """
+    Check the first k elements.
+    """
+    def __init__(self, k):
+        self.limit = positive(k, 'k')
+
+    def __repr__(self):
+        return 'first({0})'.format(self.limit)
+
+
+class sample(strategy):
+    """
+    Check k randomly chosen elements of lists, and the first k items of
+    dicts, which can not be sampled without copying them.
+    """
+    random = True
+
+    def __init__(self, k):
+        self.limit = positive(k, 'k')
+
+    def __repr__(self):
+        return 'sample({0})'.format(self.limit)
+
+
+class budget(strategy):
+    """
+    Check elements until the number of elements or the time in seconds
+    has been spent.
+    """
+    def __init__(self, elements=None, seconds=None):
+        if elements is None and seconds is None:
+            raise TypeError('Needs a budget of elements or seconds.')
+        self.limit = None if elements is None else positive(elements, 'elements')
+        self.seconds = None if seconds is None else positive(seconds, 'seconds')
+
+    def __repr__(self):
+        return 'budget({0})'.format(', '.join(
+            '{0}={1}'.format(key, value)
+            for key, value in (('elements', self.limit), ('seconds', self.seconds))
+            if value is not None
+        ))
+
+
+def positive(value, name):
+    if not value > 0:
+        raise ValueError('Expected a positive {0}, got {1}.'.format(name, value))
+    return value
+
+
+def choose(elements, k):
+    """
+    k randomly chosen elements of a sequence, or the first k of other
+    iterables.
+    """
+    if not isinstance(elements, (list, tuple)):
+        return islice(elements, k)
+    if len(elements) <= k:
+        return elements
+    return random.sample(elements, k)
+
+
+def deadline(seconds):
+    """
+    The clock time after seconds, see sagitta.stats.clock.
+    """
+    return clock() + int(seconds * 1e9)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Streaming the items of an iterator through the stages of an arrow
+
+A runner pulls items from a source, like the lines of a file, in chunks
+and pushes each chunk through the stages of a composed arrow:
+
+    lengths = (strip >> length).stream(open('big.txt'), chunk=1000)
+
+Each stage checks the values of a chunk only once for each distinct
+argument type and return type, like arrow.starmap, so the checks cost
+little more than the calls for chunks of values of the same type.
+
+The results are yielded lazily, and the next chunk is pulled only when
+the results of the previous ones have been consumed, so a slow stage or
+consumer never makes the runner buffer more than a few chunks. With a
+concurrent.futures executor as the pool, up to ahead chunks are run on
+the pool at the same time.
+"""
+
+from collections import deque
+from itertools import islice
+
+from sagitta.exceptions import StrictTypeError
+from sagitta.inspect import classname
+from sagitta.strategy import positive
+
+
+CHUNK_SIZE = 256
+
+
+def chunks(iterable, size):
+    """
+    Lists of up to size items pulled from the iterable.
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def batch(stage, values):
+    """
+    Apply a stage to a chunk of values.
+    """
+    if not stage.checking:
+        call = stage._call
+        return [call(value) for value in values]
+    return list(stage._starmap((value,) for value in values))
+
+
+def run(stages, chunk):
+    """
+    Push a chunk through the stages.
+    """
+    for stage in stages:
+        chunk = batch(stage, chunk)
+    return chunk
+
+
+class runner(object):
+    """
+    Runner streaming the items of iterators through the stages of an arrow
+    in chunks.
+    """
+    def __init__(self, arr, chunk=CHUNK_SIZE, pool=None, ahead=2):
+        self.stages = arr._stages()
+        for stage in self.stages:
+            if stage._awaits:
+                raise TypeError("Can not stream through coroutine function {0}.".format(stage))
+            if len(stage.signature.args) != 1:
+                raise StrictTypeError(
+                    "Can not stream through {0}, it takes {1} arguments instead of one."
+                    "".format(stage, len(stage.signature.args))
+                )
+        self.chunk = positive(chunk, 'chunk')
+        self.pool = pool
+        self.ahead = positive(ahead, 'ahead')
+
+    def __call__(self, iterable):
+        """
+        Lazy iterator of the results for the items of the iterable.
+        """
+        if self.pool is None:
+            return self._sequential(iterable)
+        return self._concurrent(iterable)
+
+    def _sequential(self, iterable):
+        for chunk in chunks(iterable, self.chunk):
+            for result in run(self.stages, chunk):
+                yield result
+
+    def _concurrent(self, iterable):
+        pending = deque()
+        try:
+            for chunk in chunks(iterable, self.chunk):
+                if len(pending) >= self.ahead:
+                    for result in pending.popleft().result():
+                        yield result
+                pending.append(self.pool.submit(run, self.stages, chunk))
+            while pending:
+                for result in pending.popleft().result():
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()  # <- the consumer stopped early
+
+    def __repr__(self):
+        return '{0}({1}, chunk={2})'.format(
+            classname(self),
+            ' >> '.join(repr(stage) for stage in self.stages),
+            self.chunk
+        )
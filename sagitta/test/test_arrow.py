@@ -9,8 +9,13 @@
 
 import math
 import pytest
+import sys
+import threading
 
-from sagitta.arrow import arrow, signature, typed
+import sagitta.arrow
+
+from sagitta import compiler, config
+from sagitta.arrow import arrow, pipeline, recursive, signature, typed
 from sagitta.cat import Num, Real, Int, Bool, Ord
 from sagitta.typevar import A
 
@@ -100,6 +105,44 @@ class TestTypedCall(object):
             afloat = arrow(float, A, A)  # <- should return float
             afloat(1)
 
+    def test_typevariables_are_bound_per_call(self):
+        asum = arrow(self.add, A, A, A)
+        assert asum(3, 4) == 7
+        assert asum(3.0, 4.0) == 7.0
+        assert asum.signature.constraints == {}
+
+    def test_constraints_are_checked(self):
+        asum = arrow(self.add, A, A, A, A=Real)
+        assert asum(3, 4) == 7
+        with raises(StrictTypeError, 'Expected argument'):
+            asum(1j, 2j)
+
+    def test_concurrent_calls_with_different_types(self):
+        asum = arrow(self.add, A, A, A)
+        errors = []
+
+        def work(value):
+            try:
+                for _ in range(2000):
+                    asum(value, value)
+            except StrictTypeError as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=work, args=(value,)) for value in (1, 1.0, 1j)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+    def test_check_with_bindings(self):
+        t = arrow(self.add, A, A, A)
+        bindings = {}
+        t.check(1, A, bindings)
+        assert bindings == {A: int}
+        with raises(StrictTypeError, 'Expected argument'):
+            t.check(1.5, A, bindings)
+
 class TestArrowComposition(object):
     """
     Test arrow composition operations
@@ -120,6 +163,106 @@ class TestArrowComposition(object):
 
         assert (g << f)(3, 4) == 5.0
 
+    def test_compose_flattens(self):
+        f, g, h = [arrow(lambda x: x + 1, Int, Int) for _ in range(3)]
+
+        composed = (f >> g) >> h
+        assert type(composed) is pipeline
+        assert composed.stages == [f, g, h]
+        assert (f >> (g >> h)).stages == [f, g, h]
+        assert (h << g << f).stages == [f, g, h]
+        assert ((f >> g) >> (g >> h)).stages == [f, g, g, h]
+        assert composed(0) == 3
+
+    def test_long_chains(self):
+        increment = arrow(lambda x: x + 1, Int, Int)
+        composed = increment
+        for _ in range(1999):
+            composed = composed >> increment
+        assert len(composed.stages) == 2000
+        assert composed(0) == 2000
+
+    def test_checks_intermediate_values(self):
+        f = arrow(lambda x: str(x), Int, A)
+        g = arrow(lambda x: x + 1, Int, Int)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            (f >> g)(1)
+
+    def test_compose_multiple_args_raises(self):
+        f = arrow(lambda x: x, Int, Int)
+        g = arrow(lambda x, y: x, Int, Int, Int)
+        with raises(StrictTypeError, 'Can not compose'):
+            f >> g
+
+    def test_pipeline_signature(self):
+        f = arrow(lambda x, y: x + y, A, A, A, A=Num)
+        g = arrow(lambda x: x, A, A, A=Real)
+        assert (f >> g).signature == signature(A, A, Real, A=Num)
+
+    @pytest.mark.parametrize(['returns', 'argument', 'constraints', 'expected'], [
+        [Int, Real, {}, True],
+        [bool, Int, {}, True],
+        [Real, Int, {}, False],
+        [Int, A, {}, True],
+        [Int, A, {'A': Real}, True],
+        [Real, A, {'A': Int}, False],
+        [A, Int, {}, False],
+        [A, Real, {'A': Int}, True],
+    ])
+    def test_signature_guarantees(self, returns, argument, constraints, expected):
+        first = signature(Int, returns, **constraints)
+        second = signature(argument, Int, **constraints)
+        assert first.guarantees(second) is expected
+
+    def test_proven_stages_skip_argument_checks(self):
+        f = arrow(lambda x: x + 1, Int, Int)
+        g = arrow(lambda x: x * 2.0, Real, Real)
+        h = arrow(lambda x: int(x), Real, Int)
+        i = arrow(lambda x: x, Int, Int)
+        composed = f >> g >> h >> i
+        assert composed(1) == 4
+        assert composed.proven == [False, True, True, True]
+        assert composed._calls[1] is g._trusted_call()
+        assert composed._calls[0] is f._call
+
+    def test_unproven_stages_are_checked(self):
+        f = arrow(lambda x: x / 2.0, Int, Real)
+        g = arrow(lambda x: x, Int, Int)
+        composed = f >> g
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed(1)
+        assert composed.proven == [False, False]
+
+    def test_recompiled_stages_are_restaged(self):
+        f = arrow(lambda x: x + 1, Int, Int)
+        g = arrow(lambda x: x, Int, Int)
+        composed = f >> g
+        composed(1)
+        g.set_checking(False)
+        assert composed._calls[1] is g._fun
+
+    @pytest.mark.parametrize('prepared', [False, True])
+    def test_unchecked_stages_prove_nothing(self, prepared):
+        f = arrow(lambda x: x if x else 'oops', Int, Int)
+        g = arrow(lambda x: 1, Real, Int)
+        composed = f >> g
+        if prepared:
+            assert composed(1) == 1
+        f.set_checking(False)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed(0)
+        f.set_checking(True)
+        assert composed._calls[1] is g._trusted_call()
+        f.set_sampling(2)
+        assert composed._calls[1] is g._call
+
+    def test_unchecked_pipeline(self):
+        f = arrow(lambda x: str(x), Int, A)
+        g = arrow(lambda x: x + '!', Int, Int)
+        composed = f >> g
+        composed.set_checking(False)
+        assert composed(1) == '1!'
+
 class TestTypedDecorator(object):
     """
     It should work as a function decorator.
@@ -134,3 +277,208 @@ class TestTypedDecorator(object):
         assert less_than(7, 7) is False
         assert less_than(7, 3) is False
         assert type(less_than) is arrow
+
+
+def depth(n):
+    return 0 if n == 0 else 1 + depth(n - 1)
+
+
+@typed(Int, Int, recursion='outermost')
+def recursive_depth(n):
+    return 0 if n == 0 else abs(1) + recursive_depth(n - 1)  # <- a builtin
+
+
+@typed(Int, Int)
+def checked_depth(n):
+    return 0 if n == 0 else 1 + checked_depth(n - 1)
+
+
+COUNT = 0
+
+
+@typed(Int, Int, recursion='outermost')
+def counted_depth(n):
+    global COUNT
+    COUNT += 1
+    return 0 if n == 0 else 1 + counted_depth(n - 1)
+
+
+def deepest(fun):
+    """
+    The deepest recursion fun reaches, by binary search.
+    """
+    low, high = 0, sys.getrecursionlimit()
+    while low < high:
+        middle = (low + high + 1) // 2
+        try:
+            fun(middle)
+            low = middle
+        except RecursionError:
+            high = middle - 1
+    return low
+
+
+class TestRecursive(object):
+    """
+    It should check recursive functions only at the outermost entry.
+    """
+    def test_options_are_not_constraints(self):
+        with raises(TypeError, "Unknown option 'recursive'"):
+            typed(Int, Int, recursive=True)
+        with raises(ValueError, "Unknown recursion mode 'tail'"):
+            typed(Int, Int, recursion='tail')
+
+    def test_checks_outermost_entry(self):
+        checked = []
+
+        @typed(Int, Int, recursion='outermost')
+        def factorial(n):
+            return 1 if n <= 1 else n * factorial(n - 1)
+
+        factorial.add_hook('before_check', lambda arr, args: checked.append(args))
+        assert type(factorial) is recursive
+        assert factorial(5) == 120
+        assert checked == [(5,)]
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            factorial(2.5)
+        assert factorial(5) == 120  # <- not left active by the error
+
+    def test_recurses_as_deep_as_the_function(self):
+        assert deepest(recursive_depth) >= deepest(depth) - 10
+        assert deepest(checked_depth) < deepest(depth) // 2
+        assert recursive_depth._bounce is not recursive_depth._fun
+
+    def test_functions_writing_globals_call_the_arrow(self):
+        assert counted_depth(10) == 10
+        assert counted_depth._bounce is counted_depth._fun
+
+    def test_trampoline(self):
+
+        @typed(Int, Int, Int, recursion='trampoline')
+        def total(n, acc):
+            return acc if n == 0 else total(n - 1, acc + n)
+
+        n = sys.getrecursionlimit() * 10
+        assert total(n, 0) == n * (n + 1) // 2
+        assert total(3, 0) == 6
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            total(3, 0.5)
+
+    def test_threads_enter_separately(self):
+        results = []
+
+        @typed(Int, Int, recursion='outermost')
+        def countdown(n):
+            if n == 50:
+                thread = threading.Thread(target=lambda: results.append(countdown.__call__))
+                thread.start()
+                thread.join()
+            return 0 if n == 0 else countdown(n - 1)
+
+        assert countdown(100) == 0
+        assert results == [countdown._call]
+
+
+class TestArrowMap(object):
+    """
+    It should apply the arrow to many values, checking once per type.
+    """
+    def test_map(self):
+        square = arrow(lambda x: x * x, A, A, A=Num)
+        results = square.map(iter([1, 2.0, 3]))
+        assert not isinstance(results, list)
+        assert list(results) == [1, 4.0, 9]
+
+    def test_starmap(self):
+        add = arrow(lambda x, y: x + y, A, A, A)
+        assert add.starmap([(1, 2), (1.5, 1.5)], into=list) == [3, 3.0]
+
+    def test_checks_once_per_type_tuple(self, monkeypatch):
+        validations = []
+
+        def counting(validate):
+            def counted(*args):
+                validations.append(args)
+                return validate(*args)
+            return counted
+
+        def compile_validators(sig):
+            return [counting(validate) for validate in compiler.compile_validators(sig)]
+
+        monkeypatch.setattr(sagitta.arrow, 'compile_validators', compile_validators)
+        t = arrow(lambda x: x, Int, Int)
+        assert t.map(range(100), into=list) == list(range(100))
+        assert len(validations) == 2  # arguments once and return value once
+
+    def test_wrong_types_raise(self):
+        add = arrow(lambda x, y: x + y, Int, Int, Int)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            add.starmap([(1, 2), (1, 2.5)], into=list)
+        with raises(StrictTypeError, 'Wrong number of arguments in'):
+            add.starmap([(1, 2, 3)], into=list)
+
+    def test_wrong_return_type_raises(self):
+        half = arrow(lambda x: x / 2 if x else x, Int, Int)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            half.map([0, 0, 3], into=list)
+
+
+class TestUncheckedDecorator(object):
+    """
+    It should return the function itself when checking is off.
+    """
+    @pytest.fixture(autouse=True)
+    def unchecked(self, monkeypatch):
+        monkeypatch.setattr(config, 'CHECKING', False)
+
+    def test_returns_function(self):
+
+        def less_than(a, b):
+            return a < b
+
+        declared = typed(A, A, Bool, A=Ord)(less_than)
+        assert declared is less_than
+        assert declared.signature == signature(A, A, Bool, A=Ord)
+        assert declared(1, 2.5) is True  # <- not checked
+
+    def test_wraps_builtins(self):
+        declared = typed(list, Int)(len)
+        assert declared([1, 2]) == 2
+        assert declared.__name__ == 'len'
+        assert declared.signature == signature(list, Int)
+
+    def test_wraps_classes(self):
+        declared = typed(A, Real)(float)
+        assert declared('2.5') == 2.5
+        assert declared is not float
+        assert not hasattr(float, 'signature')
+
+    def test_keeps_existing_signatures(self):
+        def identity(x):
+            return x
+        identity.signature = 'original'
+        declared = typed(A, A)(identity)
+        assert identity.signature == 'original'
+        assert declared.signature == signature(A, A)
+
+    def test_validates_signature(self):
+        with raises(TypeError, 'Needs at least two types:'):
+            typed(A)(len)
+        with raises(StrictTypeError, 'is not callable'):
+            typed(A, A)(5)
+
+    def test_set_checking(self):
+        identity = lambda x: x
+        config.set_checking(True)
+        assert type(typed(A, A)(identity)) is arrow
+        config.set_checking(False)
+        assert typed(A, A)(identity) is identity
+
+    def test_trampoline_runs_unchecked(self):
+
+        @typed(Int, Int, recursion='trampoline')
+        def countdown(n):
+            return n if n == 0 else countdown(n - 1)
+
+        assert not countdown.checking
+        assert countdown(sys.getrecursionlimit() * 2) == 0
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import asyncio
+
+from sagitta.arrow import arrow, typed
+from sagitta.asynchronous import awaiting, gather
+from sagitta.cat import Int
+from sagitta.exceptions import StrictTypeError
+from sagitta.typevar import A
+from sagitta.test import raises
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@typed(Int, Int)
+async def increment(x):
+    await asyncio.sleep(0)
+    return x + 1
+
+
+class TestCoroutineFunctions(object):
+
+    def test_checks_awaited_result(self):
+        assert increment._awaits
+        assert run(increment(1)) == 2
+
+        @typed(A, A)
+        async def stringify(x):
+            return str(x)
+
+        with raises(StrictTypeError, "Expected argument '1'"):
+            run(stringify(1))
+
+    def test_checks_arguments(self):
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            run(increment('a'))
+
+    def test_unchecked(self):
+        unchecked = arrow(increment._fun, Int, Int)
+        unchecked.set_checking(False)
+        assert run(unchecked(1)) == 2
+
+    def test_map_and_stream_are_not_supported(self):
+        with raises(TypeError, 'Can not map coroutine function'):
+            increment.map([1])
+        with raises(TypeError, 'Can not stream through coroutine function'):
+            (arrow(lambda x: x, Int, Int) >> increment).stream([1])
+
+    def test_recursion_is_not_supported(self):
+        with raises(TypeError, 'Can not check the recursion'):
+            typed(Int, Int, recursion='outermost')(increment._fun)
+
+
+class TestAwaitingPipeline(object):
+
+    def test_compose(self):
+        double = arrow(lambda x: x * 2, Int, Int)
+        composed = increment >> double >> increment
+        assert isinstance(composed, awaiting)
+        assert len(composed.stages) == 3
+        assert run(composed(1)) == 5
+        assert run((double >> increment)(1)) == 3
+
+    def test_checks_intermediate_values(self):
+        halve = arrow(lambda x: x / 2, Int, Int)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            run((increment >> halve)(0))
+
+    def test_calls_overlap(self):
+        in_flight, most = [0], [0]
+
+        @typed(Int, Int)
+        async def fetch(x):
+            in_flight[0] += 1
+            most[0] = max(most[0], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return x
+
+        composed = fetch >> increment
+        assert run(gather(composed, range(20))) == list(range(1, 21))
+        assert most[0] == 20
+        most[0] = 0
+        assert run(gather(composed, range(20), limit=5)) == list(range(1, 21))
+        assert most[0] == 5
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+from sagitta import baseline, bench
+
+
+def result(name, raw, typed):
+    return {'name': name, 'raw': raw, 'arrow': typed}
+
+
+class TestStatistics(object):
+
+    def test_median(self):
+        assert baseline.median([3, 1, 2]) == 2
+        assert baseline.median([4, 1, 2, 3]) == 2.5
+
+    def test_binomial_cdf(self):
+        assert baseline.binomial_cdf(0, 1) == 0.5
+        assert baseline.binomial_cdf(1, 2) == 0.75
+        assert baseline.binomial_cdf(4, 4) == 1.0
+
+    @pytest.mark.parametrize(['n', 'interval'], [
+        [5, (0, 4)],
+        [10, (1, 8)],
+        [20, (5, 14)],
+    ])
+    def test_median_interval(self, n, interval):
+        assert baseline.median_interval(list(range(n))) == interval
+
+
+class TestCompare(object):
+
+    def test_regression(self):
+        saved = {'results': [result('slow', [1.0] * 5, [2.0, 2.1, 2.0, 1.9, 2.0])]}
+        current = [result('slow', [1.0] * 5, [3.0, 3.1, 3.0, 2.9, 3.0])]
+        comparison, = baseline.compare(saved, current, threshold=10)
+        assert comparison['regressed']
+        assert comparison['change'] == pytest.approx(50.0)
+
+    def test_noise_is_not_a_regression(self):
+        saved = {'results': [result('noisy', [1.0] * 5, [2.0, 1.0, 3.0, 2.0, 2.0])]}
+        current = [result('noisy', [1.0] * 5, [2.5, 1.5, 3.0, 2.5, 2.5])]
+        comparison, = baseline.compare(saved, current, threshold=10)
+        assert not comparison['regressed']
+
+    def test_threshold(self):
+        saved = {'results': [result('steady', [1.0] * 5, [2.0] * 5)]}
+        current = [result('steady', [1.0] * 5, [2.1] * 5)]
+        comparison, = baseline.compare(saved, current, threshold=10)
+        assert not comparison['regressed']
+
+    def test_skips_errors_and_new_benchmarks(self):
+        saved = {'results': [{'name': 'deep', 'error': 'RecursionError'}]}
+        current = [result('deep', [1.0], [2.0]), result('new', [1.0], [2.0])]
+        assert baseline.compare(saved, current) == []
+
+
+class TestMain(object):
+
+    def test_save_and_compare(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(bench, 'ARITIES', [1])
+        path = str(tmpdir.join('baseline.json'))
+        options = ['-g', 'arity', '-r', '3', '-t', '0.001']
+
+        assert bench.main(options + ['--save-baseline', path]) == 0
+        saved = baseline.load(path)
+        assert saved['environment']['python']
+        assert baseline.mismatch(saved['environment']) == []
+        assert bench.main(options + ['--compare', path, '--threshold', '1000']) == 0
+
+    def test_run_is_not_a_regression_of_itself(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(bench, 'ARITIES', [1, 2])
+        path = str(tmpdir.join('baseline.json'))
+        options = ['-g', 'arity', '-r', '5', '-t', '0.005']
+
+        assert bench.main(options + ['--save-baseline', path]) == 0
+        assert bench.main(options + ['--compare', path]) == 0  # <- default threshold
+
+    def test_regressions_are_confirmed(self, tmpdir, monkeypatch):
+        path = str(tmpdir.join('baseline.json'))
+        baseline.save(path, [result('slow', [1.0] * 5, [2.0] * 5)])
+        runs = [
+            [result('slow', [1.0] * 5, [3.0] * 5)],
+            [result('slow', [1.0] * 5, [2.0] * 5)],  # <- not confirmed
+        ]
+        monkeypatch.setattr(bench, 'run', lambda *args, **kwargs: runs.pop(0))
+        assert bench.main(['--compare', path]) == 0
+        assert runs == []
+
+        runs = [[result('slow', [1.0] * 5, [3.0] * 5)]] * 3
+        assert bench.main(['--compare', path]) == 1
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import json
+import pytest
+
+from sagitta import bench
+
+
+@pytest.fixture(autouse=True)
+def small(monkeypatch):
+    monkeypatch.setattr(bench, 'ARITIES', [1, 3])
+    monkeypatch.setattr(bench, 'DEPTHS', [1, 5])
+
+
+class TestBench(object):
+
+    def test_per_call(self):
+        times = bench.per_call(lambda: None, repeat=3, min_time=0.001)
+        assert len(times) == 3
+        assert all(time > 0 for time in times)
+
+    def test_run(self):
+        results = bench.run(repeat=2, min_time=0.001)
+        names = [result['name'] for result in results]
+        assert 'arity=3 constrained' in names
+        assert 'depth=5 <<' in names
+        assert 'failing category' in names
+        for result in results:
+            assert len(result['raw']) == len(result['arrow']) == 2
+            assert result['overhead'] > 0
+
+    def test_main_writes_json(self, tmpdir):
+        output = tmpdir.join('bench.json')
+        assert bench.main(['-g', 'failure', '-r', '1', '-t', '0.001', '-o', str(output)]) == 0
+        results = json.loads(output.read())
+        assert set(result['group'] for result in results) == set(['failure'])
@@ -8,7 +8,10 @@
 
 import pytest
 
+import sagitta.cat
+
 from sagitta.cat import Category, TypeVariable, Number, Eq, Ord, Complex, Real
+from sagitta.cat import issubtype, subtypes, not_subtypes
 from sagitta.test import assert_subclass
 
 
@@ -24,3 +27,32 @@ class TestCatogeries(object):
     ])
     def test_categories(self, sub, cat):
         assert_subclass(sub, cat)
+
+
+class TestIsSubtype(object):
+
+    @pytest.mark.parametrize(['sub', 'cat', 'expected'], [
+        [int, Ord, True],
+        [float, Real, True],
+        [complex, Ord, False],
+        [str, Number, False],
+    ])
+    def test_issubtype(self, sub, cat, expected):
+        assert issubtype(sub, cat) is expected
+        assert issubtype(sub, cat) is expected  # memoized
+        assert ((sub, cat) in subtypes) is expected
+
+    def test_register_invalidates(self):
+        Custom = type('Custom', (object,), {})
+        Cat = type('Cat', (Category,), {})
+
+        assert issubtype(Custom, Cat) is False
+        assert (Custom, Cat) in not_subtypes
+        Cat.register(Custom)
+        assert issubtype(Custom, Cat) is True
+
+    def test_bounded(self, monkeypatch):
+        monkeypatch.setattr(sagitta.cat, 'SUBTYPE_CACHE_SIZE', 8)
+        for _ in range(20):
+            issubtype(type('Dynamic', (object,), {}), Eq)
+        assert len(not_subtypes) <= 8
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+try:
+    from unittest import mock
+except ImportError:  # Python 2
+    import mock
+
+from sagitta.arrow import arrow
+from sagitta.cat import Int, Real
+from sagitta.compiler import INLINE_CACHE_SIZE, compile_arrow, source
+from sagitta.exceptions import StrictTypeError
+from sagitta.typevar import A
+from sagitta.test import raises
+
+
+def add(x, y):
+    return x + y
+
+
+class TestCompileArrow(object):
+
+    def test_source_unrolls_arguments(self):
+        src = str(source(arrow(add, Int, Real, Real)))
+        namespace = source(arrow(add, Int, Real, Real)).namespace
+        assert 'a0, a1, = args' in src
+        assert namespace['T0'] is Int
+        assert namespace['T1'] is Real
+        assert namespace['R'] is Real
+
+    def test_compiled_call(self):
+        checked = compile_arrow(arrow(add, Int, Int, Int))
+        assert checked(1, 2) == 3
+
+    @pytest.mark.parametrize('args', [(), (1,), (1, 2, 3)])
+    def test_fixed_arity(self, args):
+        checked = compile_arrow(arrow(add, A, A, A))
+        with raises(StrictTypeError, 'Wrong number of arguments in'):
+            checked(*args)
+
+    def test_spoofed_classes_are_rejected(self):
+        t = arrow(lambda x: x, int, int)
+        spoof = mock.Mock(spec=int)
+        assert isinstance(spoof, int)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            t(spoof)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            t.check(spoof, int)
+        with raises(StrictTypeError, "Element"):
+            arrow(lambda x: x, [int], [int])([spoof])
+
+    def test_keyword_arguments_raise(self):
+        t = arrow(add, Int, Int, Int)
+        with raises(StrictTypeError, "Wrong number of arguments in '(1,)' and keyword arguments ['y']"):
+            t(1, y=2)
+        t.set_sampling(1)
+        with raises(StrictTypeError, 'Wrong number of arguments'):
+            t(1, y=2)
+
+    def test_arrow_calls_compiled_path(self):
+        t = arrow(add, Int, Int, Int)
+        assert callable(t)
+        assert t.__call__ is t._call
+
+
+class TestInlineCache(object):
+
+    def test_records_argument_types(self):
+        t = arrow(add, A, A, A)
+        assert t(1, 2) == 3
+        assert t(1, 2) == 3
+        assert t._inline_cache == [(int, int)]
+        assert 'K0_0' in str(source(t))
+
+    def test_cache_hit_checks_return_value(self):
+        t = arrow(lambda x: x if x else 'nil', A, A)
+        t(1)
+        with raises(StrictTypeError, 'Expected argument'):
+            t(0)
+
+    def test_cache_miss_checks_arguments(self):
+        t = arrow(add, A, A, A)
+        t(1, 2)
+        with raises(StrictTypeError, 'Expected argument'):
+            t(1, 'a')
+        assert t._inline_cache == [(int, int)]
+
+    def test_plain_classes_are_not_cached(self):
+        t = arrow(add, int, int, int)
+        t(1, 2)
+        assert t._inline_cache == []
+
+    def test_megamorphic(self):
+        t = arrow(lambda x: x, A, A)
+        values = [1, 1.0, 1j, 'a', b'b', (), []]
+        for value in values:
+            assert t(value) is value
+        assert len(t._inline_cache) == INLINE_CACHE_SIZE
+        assert t._megamorphic
+        assert 'record' not in str(source(t))
+        for value in values:
+            assert t(value) is value
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pickle
+import pytest
+
+from sagitta.arrow import arrow, signature
+from sagitta.cat import Int, Real
+from sagitta.compiler import source
+from sagitta.container import Container, Iterator, expression, lazy, parse, typevars
+from sagitta.exceptions import StrictTypeError
+from sagitta.typevar import A, B, K, V
+from sagitta.test import raises
+
+
+def identity(x):
+    return x
+
+
+class TestParse(object):
+
+    @pytest.mark.parametrize(['expr', 'name'], [
+        [[A], '[A]'],
+        [(A, B), '(A, B)'],
+        [(Int,), '(Integral,)'],
+        [{K: V}, '{K: V}'],
+        [[(str, Int)], '[(str, Integral)]'],
+    ])
+    def test_names(self, expr, name):
+        assert isinstance(parse(expr), Container)
+        assert parse(expr).__name__ == name
+        assert expression(parse(expr)) == expr
+
+    def test_same_expressions_are_same_types(self):
+        assert parse([A]) is parse([A])
+        assert signature([A], A) == signature([A], A)
+        assert parse(int) is int
+
+    @pytest.mark.parametrize('expr', [[], [A, B], {}, {K: V, A: B}])
+    def test_invalid(self, expr):
+        with raises(TypeError, 'Expected one'):
+            parse(expr)
+
+    def test_typevars(self):
+        assert typevars(parse({K: [(A, K)]})) == [K, A]
+        assert typevars(int) == []
+
+    def test_pickle(self):
+        assert pickle.loads(pickle.dumps(parse({K: [A]}))) is parse({K: [A]})
+
+    def test_repr(self):
+        assert repr(signature([A], {str: Int}, A)) == 'signature([A], {str: Integral}, A)'
+
+
+class TestContainerCall(object):
+
+    def test_list(self):
+        head = arrow(lambda lst: lst[0], [A], A)
+        assert head([1, 2, 3]) == 1
+        with raises(StrictTypeError, "Element 'a'"):
+            head([1, 'a'])
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            head((1, 2))
+
+    def test_elements_bind_type_variables(self):
+        first = arrow(lambda lst, x: lst[0] if lst else x, [A], A, A)
+        assert first([True, False], True) is True
+        assert first([], 'a') == 'a'  # <- empty list binds nothing
+        with raises(StrictTypeError, "Expected argument 'a'"):
+            first([1], 'a')
+
+    def test_constrained_elements(self):
+        total = arrow(sum, [A], A, A=Real)
+        assert total([1.5, 2.5]) == 4.0
+        with raises(StrictTypeError, "Element 'a'"):
+            total(['a'])
+
+    def test_category_elements(self):
+        total = arrow(sum, [Int], Int)
+        assert total(list(range(100))) == 4950
+        with raises(StrictTypeError, "Element '2.5' <class 'float'> of <class 'list'>"):
+            total([1, 2.5])
+
+    def test_same_type_as_last_element(self):
+        src = str(source(arrow(sum, [Int], Int)))
+        assert 'is not l' in src
+
+    def test_tuple(self):
+        swap = arrow(lambda pair: (pair[1], pair[0]), (A, B), (B, A))
+        assert swap((1, 'a')) == ('a', 1)
+        with raises(StrictTypeError, "Argument '(1, 2, 3)' <class 'tuple'> is of wrong type for signature"):
+            swap((1, 2, 3))
+        with raises(StrictTypeError, "Element '(1,)' <class 'tuple'> of <class 'list'>"):
+            arrow(identity, [(A, B)], [(A, B)])([(1, 2), (1,)])
+        with raises(StrictTypeError, "Element 'a'"):
+            arrow(identity, (A, B), (A, A))((1, 'a'))
+
+    def test_dict(self):
+        keys = arrow(lambda d: sorted(d), {K: V}, [K], K=str)
+        assert keys({'b': 1, 'a': 2}) == ['a', 'b']
+        with raises(StrictTypeError, "Element '1'"):
+            keys({1: 1})
+        with raises(StrictTypeError, "Element 'x'"):
+            arrow(identity, {str: V}, {str: V})({'a': 1, 'b': 'x'})
+
+    def test_nested(self):
+        nested = arrow(identity, [[Int]], [[Int]])
+        assert nested([[1, 2], [3]]) == [[1, 2], [3]]
+        with raises(StrictTypeError, "Element '2.5'"):
+            nested([[1], [2.5]])
+
+    def test_return_value(self):
+        with raises(StrictTypeError, "Element 'a'"):
+            arrow(lambda x: [x, 'a'], Int, [Int])(1)
+
+    def test_not_inline_cached(self):
+        total = arrow(sum, [Int], Int)
+        total([1])
+        assert total._inline_cache == []
+        with raises(StrictTypeError, "Element '2.5'"):
+            total([2.5])
+
+    def test_map_checks_every_container(self):
+        total = arrow(sum, [Int], Int)
+        assert total.map([[1], [2]], list) == [1, 2]
+        with raises(StrictTypeError, 'is of wrong type'):
+            total.map([[1], [2.5]], list)
+
+    def test_check(self):
+        t = arrow(identity, [A], [A])
+        assert t.check([1, 2], [Int]) == [1, 2]
+        assert t.check({'a': (1, 'b')}, {str: (Int, str)}) == {'a': (1, 'b')}
+        with raises(StrictTypeError, "Expected argument 'a'"):
+            t.check([1, 'a'], [A])
+
+
+class TestIterator(object):
+
+    def test_type(self):
+        assert Iterator[A] is Iterator[A]
+        assert Iterator[A].__name__ == 'Iterator[A]'
+        assert pickle.loads(pickle.dumps(Iterator[[A]])) is Iterator[[A]]
+        with raises(TypeError, 'can not be nested'):
+            parse([Iterator[A]])
+        with raises(TypeError, 'can not be nested'):
+            Iterator[(Int, Iterator[A])]
+
+    def test_checks_elements_as_pulled(self):
+        pulled = []
+
+        def numbers():
+            for x in [1, 2, 'a', 3]:
+                pulled.append(x)
+                yield x
+
+        doubled = arrow(lambda xs: (x * 2 for x in xs), Iterator[Int], Iterator[Int])
+        results = doubled(numbers())
+        assert isinstance(results, lazy)
+        assert pulled == []  # <- not consumed by the check
+        assert next(results) == 2
+        assert next(results) == 4
+        with raises(StrictTypeError, "Argument 'a'"):
+            next(results)
+
+    def test_checks_returned_elements(self):
+        strings = arrow(lambda xs: (str(x) for x in xs), Iterator[Int], Iterator[Int])
+        with raises(StrictTypeError, "Argument '1'"):
+            list(strings(iter([1])))
+
+    def test_shares_bindings(self):
+        echo = arrow(lambda xs, y: (x for x in xs), Iterator[A], A, Iterator[A])
+        assert list(echo(iter([1, 2]), 3)) == [1, 2]
+        with raises(StrictTypeError, "Expected argument '2.5'"):
+            list(echo(iter([1, 2.5]), 3))
+
+    def test_binds_return_type(self):
+        head = arrow(lambda xs: next(iter(xs)), Iterator[A], A)
+        assert head(iter([1, 2])) == 1
+        with raises(StrictTypeError, "Expected argument '1'"):
+            arrow(lambda xs: str(next(iter(xs))), Iterator[A], A)(iter([1]))
+
+    def test_inline_cached_lazy_return(self):
+        repeat = arrow(lambda x: iter([x, x]), A, Iterator[A])
+        assert list(repeat(1)) == [1, 1]  # <- cached
+        assert list(repeat(2.0)) == [2.0, 2.0]  # <- not cached
+        assert list(repeat(3)) == [3, 3]
+        broken = arrow(lambda x: iter([x, 'a']), A, Iterator[A])
+        for value in [1, 2.0, 3]:
+            results = broken(value)
+            assert next(results) == value
+            with raises(StrictTypeError, "Expected argument 'a'"):
+                next(results)
+
+    def test_constraints(self):
+        total = arrow(sum, Iterator[A], A, A=Int)
+        assert total(iter(range(10))) == 45
+        with raises(StrictTypeError, "Expected argument '0.5'"):
+            total(iter([0.5]))
+
+    def test_requires_iterators(self):
+        total = arrow(sum, Iterator[Real], Real)
+        assert total(iter([2.0, 4.0])) == 6.0
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            total([2.0, 4.0])  # <- a list could be iterated twice
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            arrow(list, Iterator[A], [A])(1)
+
+    def test_map(self):
+        total = arrow(sum, Iterator[Int], Int)
+        assert total.map([iter([1, 2]), iter([3])], into=list) == [3, 3]
+        with raises(StrictTypeError, "Argument 'a'"):
+            total.map([iter([1]), iter(['a'])], into=list)
+        strings = arrow(lambda x: iter([str(x)]), Int, Iterator[Int])
+        results = strings.map([1], into=list)
+        with raises(StrictTypeError, "Argument '1'"):
+            list(results[0])
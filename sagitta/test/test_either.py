@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+from sagitta.either import Either, Left, Right
+
+
+class TestEither(object):
+
+    def test_tags(self):
+        assert isinstance(Left(1), Either)
+        assert isinstance(Right(1), Either)
+        assert Left(1).value == 1
+
+    def test_equality(self):
+        assert Left(1) == Left(1)
+        assert Left(1) != Right(1)
+        assert Left(1) != 1
+        assert len(set([Left(1), Left(1), Right(1)])) == 2
+
+    def test_repr(self):
+        assert repr(Right('a')) == "Right('a')"
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pickle
+import threading
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from sagitta.arrow import arrow, typed
+from sagitta.cat import Int, Real
+from sagitta.either import Either, Left, Right
+from sagitta.exceptions import StrictTypeError
+from sagitta.graph import choice, fanin, fanout, shared, split
+from sagitta.typevar import A
+from sagitta.test import raises
+
+
+def increment(x):
+    return x + 1
+
+
+def double(x):
+    return x * 2
+
+
+def add(x, y):
+    return x + y
+
+
+@typed(Int, Int)
+def triple(x):
+    return x * 3
+
+
+class TestCombinators(object):
+
+    def test_first_and_second(self):
+        f = arrow(increment, Int, Int)
+        assert f.first()((1, 'a')) == (2, 'a')
+        assert f.second()(('a', 1)) == ('a', 2)
+
+    def test_split(self):
+        composed = arrow(increment, Int, Int) * arrow(double, Real, Real)
+        assert type(composed) is split
+        assert composed((1, 1.5)) == (2, 3.0)
+
+    def test_fanout(self):
+        composed = arrow(increment, Int, Int) & arrow(double, Real, Real)
+        assert type(composed) is fanout
+        assert composed(1) == (2, 2)
+        assert composed.signature.args == [Int]
+
+    def test_fanout_of_type_variables(self):
+        composed = arrow(increment, A, A, A=Int) & arrow(double, A, A)
+        assert composed.signature.args == [Int]
+
+    def test_python_precedence(self):
+        f = arrow(increment, Int, Int)
+        assert (f * f * f)(((1, 2), 3)) == ((2, 3), 4)  # <- left associative
+        assert (f * (f * f))((1, (2, 3))) == (2, (3, 4))
+        assert (f & f >> f)(1) == (2, 3)  # <- >> binds tighter
+        assert ((f & f) >> arrow(len, tuple, Int))(1) == 2
+
+    def test_branches_check_their_values(self):
+        composed = arrow(increment, Int, Int) * arrow(double, Real, Real)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed((1, 'a'))
+        with raises(StrictTypeError, 'Expected a tuple of 2 values'):
+            composed((1, 2, 3))
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed([1, 2])
+
+    def test_branches_take_one_argument(self):
+        with raises(StrictTypeError, 'Can not combine'):
+            arrow(add, Int, Int, Int) & arrow(increment, Int, Int)
+
+    def test_composes_with_pipelines(self):
+        f = arrow(increment, Int, Int)
+        composed = (f & f) >> arrow(lambda pair: pair[0] + pair[1], tuple, Int)
+        assert composed(1) == 4
+
+    def test_repr(self):
+        composed = arrow(increment, Int, Int) * arrow(double, Real, Real)
+        assert repr(composed) == 'split(arrow(increment, Integral, Integral) * arrow(double, Real, Real))'
+
+
+class TestConcurrentBranches(object):
+
+    def test_thread_pool(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(x):
+            barrier.wait()  # <- blocks unless the branches run concurrently
+            return x
+
+        meeting = arrow(meet, Int, Int)
+        with ThreadPoolExecutor(2) as pool:
+            assert meeting.split(meeting, pool)((1, 2)) == (1, 2)
+            assert meeting.fanout(meeting, pool)(3) == (3, 3)
+
+    def test_errors_are_raised(self):
+        f = arrow(increment, Int, Int)
+        with ThreadPoolExecutor(2) as pool:
+            with raises(StrictTypeError, 'is of wrong type for signature'):
+                f.split(f, pool)((1, 'a'))
+
+    def test_process_pool(self):
+        f, g = arrow(increment, Int, Int), arrow(double, Int, Int)
+        with ProcessPoolExecutor(2) as pool:
+            assert f.fanout(f >> g, pool)(1) == (2, 4)
+            assert triple.fanout(f >> triple, pool)(1) == (3, 6)
+
+    def test_pickle(self):
+        f = arrow(increment, A, A, A=Int)
+        f.set_checking(False)
+        copy = pickle.loads(pickle.dumps(f))
+        assert copy.signature == f.signature
+        assert not copy.checking
+        composed = pickle.loads(pickle.dumps(f >> f & f))
+        assert composed(1) == (3, 2)
+        assert pickle.loads(pickle.dumps(triple)) is triple
+
+
+class TestChoice(object):
+
+    def test_left_and_right(self):
+        f = arrow(increment, Int, Int)
+        assert f.left()(Left(1)) == Left(2)
+        assert f.left()(Right('a')) == Right('a')
+        assert f.right()(Right(1)) == Right(2)
+        assert f.right()(Left('a')) == Left('a')
+
+    def test_choice(self):
+        composed = arrow(increment, Int, Int) + arrow(str.upper, str, str)
+        assert type(composed) is choice
+        assert composed(Left(1)) == Left(2)
+        assert composed(Right('a')) == Right('A')
+
+    def test_fanin(self):
+        composed = arrow(increment, Int, Int) | arrow(len, str, Int)
+        assert type(composed) is fanin
+        assert composed(Left(1)) == 2
+        assert composed(Right('abc')) == 3
+        assert composed.signature.returns is Int
+        assert (arrow(increment, Int, Int) | arrow(str.upper, str, str)).signature.returns is object
+
+    def test_checks_only_the_branch_taken(self):
+        checked = []
+        f = arrow(increment, Int, Int)
+        g = arrow(len, str, Int)
+        f.add_hook('before_check', lambda arr, args: checked.append('f'))
+        g.add_hook('before_check', lambda arr, args: checked.append('g'))
+        composed = (f + g) >> (f | g)
+        assert composed(Left(1)) == 3
+        assert checked == ['f', 'f']
+
+    def test_routes_by_tag(self):
+        composed = arrow(increment, Int, Int) + arrow(len, str, Int)
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed(Right(1))
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed(1)
+        with raises(StrictTypeError, 'Expected a value tagged Left or Right'):
+            composed(Either(1))
+
+    def test_repr(self):
+        composed = arrow(increment, Int, Int) | arrow(len, str, Int)
+        assert repr(composed) == 'fanin(arrow(increment, Integral, Integral) | arrow(len, str, Integral))'
+
+
+class TestShared(object):
+
+    def counted(self, calls):
+        def count(x):
+            calls.append(x)
+            return x + 1
+        return arrow(count, Int, Int)
+
+    def test_calls_repeated_arrows_once(self):
+        calls = []
+        f = self.counted(calls)
+        g, h = arrow(double, Int, Int), arrow(increment, Int, Int)
+        graph = (f >> g) & (f >> h) & f
+        assert graph(1) == ((4, 3), 2)
+        assert calls == [1, 1, 1]
+
+        del calls[:]
+        composed = graph.shared()
+        assert type(composed) is shared
+        assert composed(1) == ((4, 3), 2)
+        assert calls == [1]
+        assert composed(2) == ((6, 4), 3)
+        assert calls == [1, 2]
+
+    def test_different_arguments_are_not_shared(self):
+        calls = []
+        f = self.counted(calls)
+        composed = (f * f).shared()
+        assert composed((1000, 2000)) == (1001, 2001)
+        assert calls == [1000, 2000]
+
+    def test_checks_are_kept(self):
+        f = arrow(increment, Int, Int)
+        composed = (f & f).shared()
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            composed('a')
+        assert composed(1) == (2, 2)
+
+    def test_results_are_not_kept_between_calls(self):
+        f = arrow(increment, Int, Int)
+        composed = (f & f).shared()
+        composed(1)
+        assert composed._tables.current is None
+
+    def test_overlapping_calls_have_own_tables(self):
+        started, release = threading.Event(), threading.Event()
+
+        def wait(x):
+            if x == 1:
+                started.set()
+                release.wait(5)
+            return x
+
+        f = arrow(wait, Int, Int)
+        composed = (f & f).shared()
+        thread = threading.Thread(target=composed, args=(1,))
+        thread.start()
+        started.wait(5)
+        assert composed(2) == (2, 2)
+        assert composed._tables.current is None  # <- while the other call runs
+        release.set()
+        thread.join()
+
+    def test_repr(self):
+        f = arrow(increment, Int, Int)
+        assert repr((f & f).shared()) == 'shared({0!r})'.format(f & f)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+from sagitta import hooks
+from sagitta.arrow import arrow
+from sagitta.cat import Int
+from sagitta.compiler import source
+from sagitta.exceptions import StrictTypeError
+from sagitta.test import raises
+from sagitta.typevar import A
+
+
+def add(x, y):
+    return x + y
+
+
+@pytest.fixture(autouse=True)
+def clear():
+    yield
+    hooks.clear()
+
+
+def tracer(events, event):
+    def hook(arr, *args):
+        events.append((event, arr) + args)
+    return hook
+
+
+class TestHooks(object):
+
+    def test_no_hooks_compile_to_nothing(self):
+        assert 'before_check' not in str(source(arrow(add, A, A, A)))
+
+    def test_unknown_event_raises(self):
+        with raises(ValueError, 'Unknown event'):
+            hooks.register('before_lunch', lambda arr, args: None)
+
+    def test_arrow_hooks(self):
+        events = []
+        t = arrow(add, A, A, A)
+        for event in hooks.EVENTS:
+            t.add_hook(event, tracer(events, event))
+
+        assert t(1, 2) == 3
+        assert events == [
+            ('before_check', t, (1, 2)),
+            ('after_check', t, (1, 2)),
+            ('after_call', t, (1, 2), 3),
+        ]
+        assert t(1, 2) == 3  # <- from the inline cache
+        assert len(events) == 6
+
+        del events[:]
+        with raises(StrictTypeError):
+            t(1, 'a')
+        assert [event[0] for event in events] == ['before_check', 'on_error']
+        assert isinstance(events[-1][2], StrictTypeError)
+
+    def test_map_and_stream_call_hooks(self):
+        events = []
+        t = arrow(lambda x: x + 1, Int, Int)
+        t.add_hook('after_call', tracer(events, 'after_call'))
+        assert t.map([1, 2], into=list) == [2, 3]
+        assert list(t.stream([3])) == [4]
+        assert [event[2:] for event in events] == [((1,), 2), ((2,), 3), ((3,), 4)]
+
+        del events[:]
+        t.add_hook('on_error', tracer(events, 'on_error'))
+        with raises(StrictTypeError):
+            t.map(['a'], into=list)
+        assert [event[0] for event in events] == ['on_error']
+
+    def test_remove_hook(self):
+        events = []
+        hook = tracer(events, 'before_check')
+        t = arrow(add, Int, Int, Int)
+        t.add_hook('before_check', hook)
+        t.remove_hook('before_check', hook)
+        t(1, 2)
+        assert events == []
+
+    def test_global_hooks(self):
+        events = []
+        t = arrow(add, Int, Int, Int)
+        hook = tracer(events, 'after_call')
+        hooks.register('after_call', hook)
+        u = arrow(add, Int, Int, Int)
+
+        t(1, 2)
+        u(3, 4)
+        assert events == [('after_call', t, (1, 2), 3), ('after_call', u, (3, 4), 7)]
+
+        hooks.unregister('after_call', hook)
+        t(1, 2)
+        assert len(events) == 2
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+from sagitta.arrow import arrow
+from sagitta.cat import Int
+from sagitta.typevar import A
+from sagitta.profiling import profile, report
+
+
+def slow(x):
+    total = 0
+    for i in range(100):
+        total += i
+    return x + total
+
+
+class TestProfilerNames(object):
+
+    def test_call_path_is_named_after_function(self):
+        t = arrow(slow, Int, Int)
+        assert t._call.__name__ == 'slow'
+        assert t._call.__module__ == slow.__module__
+        assert t._call.__wrapped__ is slow
+        assert t._call.__code__.co_name == 'slow'
+        assert t._call.__code__.co_filename == '<sagitta sagitta.test.test_profiling.slow>'
+
+    def test_sampled_call_path_is_named_after_function(self):
+        t = arrow(slow, Int, Int)
+        t.set_sampling(2)
+        assert t._call.__code__.co_name == 'slow'
+
+
+class TestProfile(object):
+
+    def test_attribution(self):
+        t = arrow(slow, Int, Int)
+        t.set_checking(False)
+        t.set_checking(True)  # <- recompiled from the same source
+
+        def run():
+            return [t(i) for i in range(200)]
+
+        result, rows = profile(run)
+        assert len(result) == 200
+        row, = [row for row in rows if row['arrow'] == 'sagitta.test.test_profiling.slow']
+        assert row['calls'] == 200
+        assert row['function'] > 0
+        assert row['checking'] == pytest.approx(row['total'] - row['function'])
+
+    def test_arrows_of_same_function_are_separate(self):
+        t, u = arrow(slow, Int, Int), arrow(slow, A, A)
+        double, triple = arrow(lambda x: x * 2, Int, Int), arrow(lambda x: x * 3, Int, Int)
+
+        def run():
+            return [t(i) + u(i) + u(i) + double(i) + triple(i) + triple(i) for i in range(10)]
+
+        rows = profile(run)[1]
+        calls = sorted(row['calls'] for row in rows if row['arrow'].endswith('slow'))
+        assert calls == [10, 20]
+        calls = sorted(row['calls'] for row in rows if row['arrow'].endswith('<lambda>'))
+        assert calls == [10, 20]
+
+    def test_report(self, capsys):
+        report([{'arrow': 'mod.fun', 'calls': 3, 'total': 0.3, 'checking': 0.1, 'function': 0.2}])
+        out = capsys.readouterr()[0]
+        assert 'mod.fun' in out
+        assert 'checking' in out
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+from sagitta import registry
+from sagitta.arrow import arrow, typed
+from sagitta.cat import Int
+from sagitta.typevar import A
+
+
+def typed_in(module, *types):
+    def fun(x):
+        return x
+    fun.__module__ = module
+    return typed(*types)(fun)
+
+
+recompile = arrow._compile
+
+
+@pytest.fixture(autouse=True)
+def states(monkeypatch):
+    monkeypatch.setattr(registry, '_states', {})
+    monkeypatch.setattr(registry, '_arrows', {})
+
+
+class TestRegistry(object):
+
+    def test_groups_by_module(self):
+        first = typed_in('app.first', A, A)
+        second = typed_in('app.second', A, A)
+        assert registry.arrows('app.first') == [first]
+        assert set(registry.arrows('app')) == set([first, second])
+        assert set(registry.arrows()) == set([first, second])
+
+    def test_disable_and_enable_module(self):
+        first = typed_in('app.first', Int, Int)
+        second = typed_in('app.second', Int, Int)
+
+        registry.disable('app.first')
+        assert first._call is first._fun
+        assert first('unchecked') == 'unchecked'
+        assert second.checking
+
+        registry.enable('app.first')
+        assert first.checking
+        with pytest.raises(TypeError):
+            first('checked')
+
+    def test_disable_all_then_enable_one(self):
+        first = typed_in('app.first', Int, Int)
+        second = typed_in('app.second', Int, Int)
+
+        registry.disable()
+        registry.enable('app.second')
+        assert not first.checking
+        assert second.checking
+
+    def test_package_state_replaces_submodule_states(self):
+        registry.enable('app.first')
+        registry.disable('app')
+        assert not registry.checking('app.first')
+        assert registry.checking('other')
+
+    def test_state_applies_to_later_arrows(self):
+        registry.disable('app')
+        assert not typed_in('app.later', Int, Int).checking
+        assert typed_in('other', Int, Int).checking
+
+    def test_registers_without_recompiling(self, monkeypatch):
+        compiled = []
+        monkeypatch.setattr(arrow, '_compile', lambda self: compiled.append(self) or recompile(self))
+        typed_in('app', Int, Int)
+        assert len(compiled) == 1
+
+    def test_disabled_map_calls_directly(self):
+        first = typed_in('app.first', Int, Int)
+        registry.disable('app')
+        assert first.map(['a', 1.5], into=list) == ['a', 1.5]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+from sagitta.arrow import arrow
+from sagitta.cat import Int
+from sagitta.exceptions import StrictTypeError
+from sagitta.sampling import Sampler
+from sagitta.test import raises
+
+
+def identity(x):
+    return x
+
+
+class TestSampler(object):
+
+    @pytest.mark.parametrize('rate', [0, -1, 1.5, 0.0, 2.5])
+    def test_invalid_rate_raises(self, rate):
+        with raises(ValueError):
+            Sampler(rate)
+
+    def test_every_nth(self):
+        checked = []
+        sampled = Sampler(3).wrap(identity, lambda x: checked.append(x) or x)
+        assert [sampled(i) for i in range(1, 10)] == list(range(1, 10))
+        assert checked == [3, 6, 9]
+
+    def test_random_fraction(self):
+        sampler = Sampler(0.25)
+        sampled = sampler.wrap(identity, identity)
+        for i in range(4000):
+            sampled(i)
+        assert sampler.calls == 4000
+        assert 700 < sampler.sampled < 1300
+
+
+class TestSampledArrow(object):
+
+    def test_sampled_calls_are_checked(self):
+        t = arrow(identity, Int, Int)
+        t.set_sampling(2)
+        assert t('skipped') == 'skipped'
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            t('checked')
+
+    def test_statistics(self):
+        t = arrow(identity, Int, Int)
+        assert 'sampling' not in t.statistics()
+        t.set_sampling(4)
+        for i in range(10):
+            t(i)
+        assert t.statistics()['sampling'] == {
+            'rate': 4, 'calls': 10, 'sampled': 2, 'skipped': 8,
+        }
+
+    def test_full_checking(self):
+        t = arrow(identity, Int, Int)
+        t.set_sampling(100)
+        t.set_sampling(None)
+        with raises(StrictTypeError):
+            t('checked')
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pytest
+
+from sagitta import stats
+from sagitta.arrow import arrow
+from sagitta.cat import Int
+from sagitta.exceptions import StrictTypeError
+from sagitta.typevar import A
+
+
+def add(x, y):
+    return x + y
+
+
+class TestStatistics(object):
+
+    def test_percentile(self):
+        statistics = stats.Statistics()
+        assert statistics.percentile(50) is None
+        statistics.histogram[10] = 98
+        statistics.histogram[20] = 2
+        assert statistics.percentile(50) == 2 ** 10 / 1e9
+        assert statistics.percentile(99) == 2 ** 20 / 1e9
+
+    def test_counting(self):
+        statistics = stats.Statistics()
+        error = statistics.counting(StrictTypeError)
+        assert isinstance(error('message'), StrictTypeError)
+        assert statistics.counters[stats.ERRORS] == 1
+
+
+class TestArrowStatistics(object):
+
+    def test_disabled_by_default(self):
+        t = arrow(add, Int, Int, Int)
+        assert t.statistics() == {}
+        assert 'clock' not in t._call.__globals__
+
+    def test_records_calls(self):
+        t = arrow(add, A, A, A)
+        t.set_statistics()
+        for i in range(10):
+            assert t(i, i) == 2 * i
+        with pytest.raises(StrictTypeError):
+            t(1, 'a')
+        with pytest.raises(StrictTypeError):
+            t(1)
+
+        result = t.statistics()
+        assert result['calls'] == 12
+        assert result['errors'] == 2
+        assert sum(result['histogram'].values()) == 10
+        assert result['fun_time'] > 0
+        assert result['args_time'] > 0
+        assert 0 < result['overhead_p50'] <= result['overhead_p99']
+
+    def test_records_map_and_stream(self):
+        t = arrow(lambda x: x + 1, Int, Int)
+        t.set_statistics()
+        assert t.map([1, 2, 3], into=list) == [2, 3, 4]
+        assert list(t.stream([4, 5])) == [5, 6]
+        assert t.statistics()['calls'] == 5
+
+    def test_disable(self):
+        t = arrow(add, Int, Int, Int)
+        t.set_statistics()
+        t.set_statistics(False)
+        t(1, 2)
+        assert t.statistics() == {}
+
+    def test_snapshot(self):
+        def subtract(x, y):
+            return x - y
+
+        t = arrow(subtract, Int, Int, Int)
+        t.set_statistics()
+        t(1, 2)
+        snapshot = stats.snapshot()
+        name = 'sagitta.test.test_stats.{0}'.format(getattr(subtract, '__qualname__', 'subtract'))
+        assert name in snapshot
+        assert snapshot[name]['calls'] == 1
+        t.set_statistics(False)
+        assert name not in stats.snapshot()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import pickle
+import pytest
+
+from sagitta.arrow import arrow, signature, typed
+from sagitta.cat import Int
+from sagitta.exceptions import StrictTypeError
+from sagitta.strategy import budget, choose, first, full, sample
+from sagitta.test import raises
+
+
+class TestStrategies(object):
+
+    @pytest.mark.parametrize(['strategy', 'text'], [
+        [full(), 'full()'],
+        [first(10), 'first(10)'],
+        [sample(10), 'sample(10)'],
+        [budget(elements=10), 'budget(elements=10)'],
+        [budget(elements=10, seconds=0.5), 'budget(elements=10, seconds=0.5)'],
+    ])
+    def test_repr(self, strategy, text):
+        assert repr(strategy) == text
+
+    def test_validation(self):
+        with raises(ValueError, 'Expected a positive k'):
+            first(0)
+        with raises(TypeError, 'Needs a budget'):
+            budget()
+
+    def test_choose(self):
+        assert choose([1, 2], 5) == [1, 2]
+        assert len(choose(list(range(100)), 5)) == 5
+        assert list(choose({'a': 1, 'b': 2}.items(), 1)) == [('a', 1)]
+
+    def test_equality(self):
+        assert first(10) == first(10)
+        assert first(10) != sample(10)
+        assert signature([Int], Int, elements=first(1)) != signature([Int], Int)
+
+
+class TestSignatureStrategies(object):
+
+    def test_default_is_full(self):
+        sig = signature([Int], Int)
+        assert sig.elements == full()
+        assert repr(sig) == 'signature([Integral], Integral)'
+
+    def test_shown_in_repr_and_errors(self):
+        total = arrow(sum, [Int], Int, elements=first(2))
+        assert repr(total.signature) == 'signature([Integral], Integral, elements=first(2))'
+        with raises(StrictTypeError, 'elements=first(2)'):
+            total([1, 'a'])
+
+    def test_first(self):
+        length = arrow(len, [Int], Int, elements=first(2))
+        assert length([1, 2, 'a']) == 3  # <- not checked
+        with raises(StrictTypeError, "Element 'a'"):
+            length([1, 'a'])
+
+    def test_dict(self):
+        length = arrow(len, {str: Int}, Int, elements=first(1))
+        assert length({'a': 1, 'b': 'x'}) == 2
+        with raises(StrictTypeError, "Element '1'"):
+            length({1: 1})
+
+    def test_sample(self):
+        length = arrow(len, [Int], Int, elements=sample(3))
+        assert length([1, 2, 3]) == 3
+        with raises(StrictTypeError, "Element 'a'"):
+            length([1, 2, 'a'])  # <- all sampled
+
+    def test_budget(self):
+        length = arrow(len, [Int], Int, elements=budget(elements=2))
+        assert length([1, 2, 'a']) == 3
+        length = arrow(len, [Int], Int, elements=budget(seconds=10))
+        with raises(StrictTypeError, "Element 'a'"):
+            length([1, 2, 'a'])
+
+    def test_typed_option(self):
+
+        @typed([Int], Int, elements=first(1))
+        def length(lst):
+            return len(lst)
+
+        assert length([1, 'a']) == 2
+        with raises(TypeError, "Expected a strategy for elements"):
+            signature([Int], Int, elements=1)
+        with raises(TypeError, "Unknown option 'element'"):
+            typed([Int], Int, element=first(1))
+
+    def test_pickle(self):
+        length = arrow(len, [Int], Int, elements=sample(5))
+        assert pickle.loads(pickle.dumps(length)).signature == length.signature
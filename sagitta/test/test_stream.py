@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+from concurrent.futures import ThreadPoolExecutor
+
+import sagitta.arrow
+
+from sagitta import compiler
+from sagitta.arrow import arrow
+from sagitta.cat import Int
+from sagitta.exceptions import StrictTypeError
+from sagitta.stream import chunks, runner
+from sagitta.typevar import A
+from sagitta.test import raises
+
+
+def strip(line):
+    return line.strip()
+
+
+def length(line):
+    return len(line)
+
+
+class TestStream(object):
+
+    def test_chunks(self):
+        assert list(chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+        assert list(chunks([], 2)) == []
+
+    def test_streams_through_stages(self):
+        lengths = arrow(strip, str, str) >> arrow(length, str, Int)
+        lines = ['a\n', 'bb\n', 'ccc\n']
+        assert list(lengths.stream(iter(lines), chunk=2)) == [1, 2, 3]
+        assert repr(runner(lengths, chunk=2)) == (
+            'runner(arrow(strip, str, str) >> arrow(length, str, Integral), chunk=2)'
+        )
+
+    def test_checks_once_per_chunk_and_type(self, monkeypatch):
+        validations = []
+
+        def counting(validate):
+            def counted(*args):
+                validations.append(args)
+                return validate(*args)
+            return counted
+
+        def compile_validators(sig):
+            return [counting(validate) for validate in compiler.compile_validators(sig)]
+
+        monkeypatch.setattr(sagitta.arrow, 'compile_validators', compile_validators)
+        identity = arrow(lambda x: x, A, A)
+        assert list(identity.stream(range(10), chunk=5)) == list(range(10))
+        assert len(validations) == 4  # arguments and return value per chunk
+        del validations[:]
+        assert list(identity.stream([1, 'a', 2, 'b'], chunk=4)) == [1, 'a', 2, 'b']
+        assert len(validations) == 4  # once for each type
+
+    def test_wrong_types_raise(self):
+        lengths = arrow(strip, str, str) >> arrow(length, str, Int)
+        results = lengths.stream(['a', 'b', 1, 'c'], chunk=2)
+        assert next(results) == 1
+        assert next(results) == 1
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            next(results)
+
+    def test_is_lazy(self):
+        pulled = []
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        increment = arrow(lambda x: x + 1, Int, Int)
+        results = increment.stream(source(), chunk=10)
+        assert pulled == []
+        assert next(results) == 1
+        assert len(pulled) == 10  # <- only the first chunk
+
+    def test_pool_runs_ahead_boundedly(self):
+        pulled = []
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        increment = arrow(lambda x: x + 1, Int, Int)
+        with ThreadPoolExecutor(2) as pool:
+            results = increment.stream(source(), chunk=10, pool=pool, ahead=3)
+            assert next(results) == 1
+            assert len(pulled) <= 40
+            assert list(results) == list(range(2, 101))
+
+    def test_unchecked_stages(self):
+        strings = arrow(str, Int, Int)
+        strings.set_checking(False)
+        assert list(strings.stream([1, 2])) == ['1', '2']
+
+    def test_validates(self):
+        add = arrow(lambda x, y: x + y, Int, Int, Int)
+        with raises(StrictTypeError, 'Can not stream through'):
+            runner(add)
+        with raises(ValueError, 'Expected a positive chunk'):
+            runner(arrow(length, str, Int), chunk=0)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# pylint: disable=C0111,R0201
+# C0111: Missing docstring
+# R0201: Method could be a function
+
+import threading
+
+from sagitta import registry, trust
+from sagitta.arrow import arrow, signature, typed
+from sagitta.cat import Int, Real
+from sagitta.compiler import source
+from sagitta.exceptions import StrictTypeError
+from sagitta.typevar import A
+from sagitta.test import raises
+
+
+def increment(x):
+    return x + 1
+
+
+def spy(arr):
+    """
+    Replace the subtype checks of the call path of an arrow with ones that
+    record the checked types, and know only the subtypes between categories.
+    """
+    checked = []
+
+    def issubtype(cls, cat):
+        checked.append(cls)
+        return issubclass(cls, cat)
+
+    arr._call.__globals__['issubtype'] = issubtype
+    arr._call.__globals__['subtypes'] = set([(Int, Int)])
+    return checked
+
+
+class TestTrust(object):
+
+    def test_guaranteed(self):
+        assert trust.guaranteed(signature(Int, Real)) is Real
+        assert trust.guaranteed(signature(Int, A, A=Int)) is Int
+        assert trust.guaranteed(signature(Int, A)) is None
+
+    def test_disabled_by_default(self):
+        t = arrow(increment, Int, Int)
+        assert 'trust' not in str(source(t))
+
+    def test_records_returned_values(self):
+        t = arrow(increment, Int, Int)
+        t.set_trusting()
+        result = t(1000)
+        assert trust.record.last == (result, Int)
+
+    def test_skips_checking_trusted_arguments(self):
+        f = arrow(increment, Int, Int)
+        g = arrow(increment, Int, Int)
+        f.set_trusting()
+        g.set_trusting()
+        g._megamorphic = True
+        g._compile()
+        checked = spy(g)
+
+        # Only the return values are checked
+        assert g(f(1000)) == 1002
+        assert checked == [int]
+        assert g(2000) == 2001
+        assert checked == [int, int, int]
+
+    def test_wrong_values_are_never_trusted(self):
+        f = arrow(lambda x: 1.5, Int, Real)
+        g = arrow(increment, Int, Int)
+        f.set_trusting()
+        g.set_trusting()
+        with raises(StrictTypeError, 'is of wrong type for signature'):
+            g(f(1))
+
+    def test_record_is_thread_local(self):
+        t = arrow(increment, Int, Int)
+        t.set_trusting()
+        t(1000)
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(trust.record.last))
+        thread.start()
+        thread.join()
+        assert seen == [(trust.NOTHING, object)]
+
+    def test_enable_by_module(self, monkeypatch):
+        monkeypatch.setattr(registry, '_arrows', {})
+
+        @typed(Int, Int)
+        def trusting(x):
+            return x
+
+        assert not trusting._trusting
+        trust.enable(__name__)
+        assert trusting._trusting
+        trust.disable(__name__)
+        assert not trusting._trusting
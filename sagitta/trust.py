@@ -0,0 +1,82 @@
+#!/usr/bin/env python -u
+# encoding: utf-8
+#
+# Copyright (c) 2013, Peter Hillerström <peter.hillerstrom@gmail.com>
+# All rights reserved. This software is licensed under MIT license.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+"""
+Trusted values of nested typed calls
+
+When typed functions call each other, the value returned and checked by
+one arrow is usually checked again as an argument of the next one:
+
+    g(f(x))
+
+A trusting arrow records the value it returns together with its declared
+return type, and skips checking an argument that is the very same object
+as the last recorded value when the recorded type guarantees the argument
+type. So the value is checked once at the boundary instead of at every
+layer.
+
+The record is local to each thread, and it is tested by identity, so a
+value is never trusted for a type it was not checked against. The record
+keeps the last returned value of each thread alive until the next one.
+
+Only arguments of categories are trusted, plain classes cost no more to
+check with isinstance, and type variables are always unified.
+"""
+
+import threading
+
+from sagitta import registry
+from sagitta.container import Container
+from sagitta.typevar import TypeVariable
+
+
+NOTHING = object()
+
+
+class Record(threading.local):
+    """
+    The last value returned by a trusting arrow in a thread, and the
+    category it was checked against.
+    """
+    def __init__(self):
+        self.last = (NOTHING, object)
+
+
+record = Record()
+
+
+def guaranteed(sig):
+    """
+    The category a checked return value of the signature is guaranteed to
+    be of, or None for unconstrained type variables and containers, whose
+    elements may change after the check.
+    """
+    returns = sig.returns
+    if isinstance(returns, Container):
+        return None
+    if issubclass(returns, TypeVariable):
+        return sig.constraint(returns)
+    return returns
+
+
+def enable(module=None):
+    """
+    Make the arrows of the module and its submodules built by typed,
+    or all of them, trust the values returned by each other.
+    """
+    for arr in registry.arrows(module):
+        arr.set_trusting(True)
+
+
+def disable(module=None):
+    """
+    Make the arrows of the module and its submodules built by typed,
+    or all of them, check all their arguments.
+    """
+    for arr in registry.arrows(module):
+        arr.set_trusting(False)